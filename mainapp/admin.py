@@ -9,3 +9,7 @@ admin.site.register(InternetPlan)
 admin.site.register(Customer)
 admin.site.register(OrderedPlan)
 admin.site.register(OrderedPlansList)
+admin.site.register(QueuedMail)
+admin.site.register(Account)
+admin.site.register(LedgerEntry)
+admin.site.register(BillingRun)
@@ -1,29 +1,108 @@
-from rest_framework import viewsets
+from django.utils.decorators import method_decorator
+from rest_framework import viewsets, mixins
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 
-from ..models import Service, InternetPlan, WirelessPlan, TVPlan
-from .serializers import ServiceSerializer, InternetPlanSerializer, WirelessPlanSerializer, TVPlanSerializer
+from ..models import Service, InternetPlan, WirelessPlan, TVPlan, PlanIndex
+from ..services.caching import catalogue_condition
+from .filters import CatalogueFilter, PlanAttributeFilter
+from .pagination import OptInCursorPagination, CatalogueCursorPagination
+from .serializers import (
+    ServiceSerializer,
+    InternetPlanSerializer,
+    WirelessPlanSerializer,
+    TVPlanSerializer,
+    CatalogueEntrySerializer,
+    PlanValuesSerializer
+)
 
 
+@method_decorator(catalogue_condition, name='dispatch')
 class ServiceViewSet(viewsets.ModelViewSet):
 
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
 
 
-class InternetViewSet(viewsets.ModelViewSet):
+class ValuesListMixin:
+    """
+    Lists objects from values() rows, serialized by PlanValuesSerializer, only the serialized columns
+    and the ones, the list is paginated by, are fetched
+    """
+
+    def get_values_serializer(self) -> PlanValuesSerializer:
+        return PlanValuesSerializer(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        values_fields = values_serializer.get_values_fields()
+        if self.paginator is not None:
+            values_fields += [field.lstrip('-') for field in self.paginator.get_ordering(request, queryset, self)]
+        queryset = queryset.values(*dict.fromkeys(values_fields))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.to_representation(page))
+        return Response(values_serializer.to_representation(queryset))
+
+
+@method_decorator(catalogue_condition, name='dispatch')
+class PlanViewSet(ValuesListMixin, viewsets.ModelViewSet):
+    """
+    Plans of a service with their services loaded by a join. Lists are serialized from values() rows,
+    so a list is one query, and no model instances are built. Lists are paginated by a cursor only
+    if 'page_size' or 'cursor' param is passed, otherwise the whole list is returned as an array.
+    Clients, that already have the current version of the catalogue, get "304 Not Modified" without queries.
+    Lists are filtered by ranges and facets of the service, e.g. min_speed=500 or internet_type=5G
+    """
+
+    pagination_class = OptInCursorPagination
+    filter_backends = [PlanAttributeFilter]
+
+    def get_queryset(self):
+        return self.serializer_class.Meta.model.objects.select_related('service')
+
+
+class InternetViewSet(PlanViewSet):
 
     queryset = InternetPlan.objects.all()
     serializer_class = InternetPlanSerializer
 
 
-class WirelessViewSet(viewsets.ModelViewSet):
+class WirelessViewSet(PlanViewSet):
 
     queryset = WirelessPlan.objects.all()
     serializer_class = WirelessPlanSerializer
 
 
-class TvViewSet(viewsets.ModelViewSet):
+class TvViewSet(PlanViewSet):
 
     queryset = TVPlan.objects.all()
     serializer_class = TVPlanSerializer
 
+
+@method_decorator(catalogue_condition, name='dispatch')
+class CatalogueViewSet(ValuesListMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Plans of all services in one list, read from the catalogue table with a single query per page.
+    Supports 'service', 'min_price' and 'max_price' filters, 'ordering' by price, name, headline metric
+    or days to connect, and 'fields' param with comma separated names of fields to return
+    """
+
+    queryset = PlanIndex.objects.select_related('service')
+    serializer_class = CatalogueEntrySerializer
+    pagination_class = CatalogueCursorPagination
+    filter_backends = [CatalogueFilter, OrderingFilter]
+    ordering_fields = ['price', 'name', 'headline_metric', 'days_to_connect']
+    ordering = 'price'
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.query_params.get('fields'):
+            fields = self.request.query_params['fields'].split(',')
+            unknown_fields = set(fields) - set(CatalogueEntrySerializer.Meta.fields)
+            if unknown_fields:
+                raise ValidationError({'fields': f'Unknown fields: {", ".join(sorted(unknown_fields))}.'})
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
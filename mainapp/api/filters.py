@@ -0,0 +1,48 @@
+from decimal import Decimal, InvalidOperation
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from ..services.filtering import clean_plan_filters, get_plan_filter_q, InvalidPlanFilters
+
+
+def parse_price(value: str, param: str) -> Decimal:
+    """Returns passed price query param as a decimal, or raises ValidationError"""
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({param: 'A valid number is required.'})
+    if not price.is_finite():
+        raise ValidationError({param: 'A valid number is required.'})
+    return price
+
+
+class CatalogueFilter(BaseFilterBackend):
+    """
+    Filters catalogue entries by services, passed as comma separated slugs in 'service' param,
+    and by price range of 'min_price' and 'max_price' params
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        if params.get('service'):
+            queryset = queryset.filter(service__slug__in=params['service'].split(','))
+        if params.get('min_price'):
+            queryset = queryset.filter(price__gte=parse_price(params['min_price'], 'min_price'))
+        if params.get('max_price'):
+            queryset = queryset.filter(price__lte=parse_price(params['max_price'], 'max_price'))
+        return queryset
+
+
+class PlanAttributeFilter(BaseFilterBackend):
+    """
+    Filters plans of a service by ranges of its numeric fields, passed in 'min_<field>' and 'max_<field>' params,
+    and by values of its facet fields, passed as comma separated values in '<field>' params
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        try:
+            filters = clean_plan_filters(queryset.model, request.query_params)
+        except InvalidPlanFilters as error:
+            raise ValidationError(error.errors)
+        return queryset.filter(get_plan_filter_q(queryset.model, filters))
@@ -0,0 +1,33 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class PlanCursorPagination(CursorPagination):
+    """Keyset pagination of plans by id, a page is fetched with one query wherever it is in the catalogue"""
+
+    ordering = 'id'
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class OptInCursorPagination(PlanCursorPagination):
+    """
+    Keyset pagination applied only to requests with 'page_size' or 'cursor' param,
+    other requests get the whole list as a plain array, as before pagination was added
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not {self.page_size_query_param, self.cursor_query_param} & set(request.query_params):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CatalogueCursorPagination(PlanCursorPagination):
+    """Keyset pagination of the catalogue in order of 'ordering' param, entries with equal values are ordered by id"""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if ordering[0].lstrip('-') != 'id':
+            ordering += ('id',)
+        return ordering
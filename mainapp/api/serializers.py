@@ -1,7 +1,7 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from ..models import Service, InternetPlan, WirelessPlan, TVPlan, Customer
+from ..models import Service, InternetPlan, WirelessPlan, TVPlan, Customer, PlanIndex
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -11,32 +11,96 @@ class ServiceSerializer(serializers.ModelSerializer):
         fields = ['name', 'slug']
 
 
-class BasePlanSerializer:
+class BasePlanSerializer(serializers.ModelSerializer):
+    """Fields, common for plans of all services. The service is nested for reading and passed by id for writing"""
 
-    name = serializers.CharField()
-    service = ServiceSerializer()
-    slug = serializers.SlugField()
-    price = serializers.DecimalField(max_digits=9, decimal_places=2)
-    days_to_connect = serializers.IntegerField()
-    description = serializers.CharField()
+    service = ServiceSerializer(read_only=True)
+    service_id = serializers.PrimaryKeyRelatedField(source='service', queryset=Service.objects.all(), write_only=True)
 
 
-class InternetPlanSerializer(BasePlanSerializer, serializers.ModelSerializer):
+class InternetPlanSerializer(BasePlanSerializer):
 
     class Meta:
         model = InternetPlan
         fields = '__all__'
 
 
-class WirelessPlanSerializer(BasePlanSerializer, serializers.ModelSerializer):
+class WirelessPlanSerializer(BasePlanSerializer):
 
     class Meta:
         model = WirelessPlan
         fields = '__all__'
 
 
-class TVPlanSerializer(BasePlanSerializer, serializers.ModelSerializer):
+class TVPlanSerializer(BasePlanSerializer):
 
     class Meta:
         model = TVPlan
         fields = '__all__'
+
+
+class CatalogueEntrySerializer(serializers.ModelSerializer):
+    """A plan of any service from the catalogue, only fields passed in 'fields' are serialized, if it's passed"""
+
+    service = ServiceSerializer(read_only=True)
+    plan_id = serializers.IntegerField(source='object_id', read_only=True)
+
+    class Meta:
+        model = PlanIndex
+        fields = ['plan_id', 'service', 'name', 'slug', 'price', 'headline_metric', 'days_to_connect', 'description']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class PlanValuesSerializer:
+    """
+    A read-only fast path for plan lists. Turns values() rows into the same representation, that passed plan
+    serializer gives for model instances, without building model instances and walking serializer fields
+    of every plan. Only decimals need a conversion, values of other plan fields are already JSON-ready
+    """
+
+    def __init__(self, serializer: serializers.ModelSerializer):
+        # (name, values() key, converter) of readable fields, nested serializers have a list of their fields instead
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                self.fields.append((name, None, [
+                    (sub_name, f'{field.source}__{sub_field.source}', self.get_converter(sub_field))
+                    for sub_name, sub_field in field.fields.items() if not sub_field.write_only
+                ]))
+            else:
+                self.fields.append((name, field.source, self.get_converter(field)))
+
+    @staticmethod
+    def get_converter(field):
+        return field.to_representation if isinstance(field, serializers.DecimalField) else None
+
+    def get_values_fields(self) -> list:
+        """Returns fields to pass to values() of the queryset"""
+        values_fields = []
+        for name, key, converter in self.fields:
+            if key is None:
+                values_fields += [sub_key for _, sub_key, _ in converter]
+            else:
+                values_fields.append(key)
+        return values_fields
+
+    @staticmethod
+    def convert(row: dict, fields: list) -> dict:
+        data = {}
+        for name, key, converter in fields:
+            if key is None:
+                data[name] = PlanValuesSerializer.convert(row, converter)
+            else:
+                value = row[key]
+                data[name] = converter(value) if converter is not None and value is not None else value
+        return data
+
+    def to_representation(self, rows) -> list:
+        return [self.convert(row, self.fields) for row in rows]
@@ -1,2 +1,154 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from rest_framework.test import APITestCase
 
+from ...models import WirelessPlan
+
+from ...tests.test_views import create_service, create_net_plan, create_wireless_plan, create_tv_plan
+
+
+class PlanListTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_service()
+        self.plans = [create_net_plan(name=f'Internet {i}', slug=f'net{i}') for i in range(5)]
+
+    def test_list_is_paginated(self):
+        """Tests, that plans are listed page by page in order of their ids"""
+        response = self.client.get('/api/internet/', {'page_size': 2})
+        first_page = response.json()
+        second_page = self.client.get(first_page['next']).json()
+
+        self.assertEqual([plan['slug'] for plan in first_page['results']], ['net0', 'net1'])
+        self.assertEqual([plan['slug'] for plan in second_page['results']], ['net2', 'net3'])
+        self.assertEqual(first_page['results'][0]['service'], {'name': 'Internet', 'slug': 'internet'})
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        """Tests, that a page of plans is fetched with a single query"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/internet/', {'page_size': 5})
+
+        self.assertEqual(len(response.json()['results']), 5)
+        self.assertEqual(len(queries), 1)
+
+    def test_list_is_not_paginated_by_default(self):
+        """Tests, that plans are listed as a plain array with a single query, if no page is requested"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/internet/')
+
+        self.assertEqual(sorted(plan['slug'] for plan in response.json()), [f'net{i}' for i in range(5)])
+        self.assertEqual(len(queries), 1)
+
+    def test_plan_details(self):
+        """Tests, that a single plan is retrieved with its service"""
+        response = self.client.get(f'/api/internet/{self.plans[0].id}/')
+
+        self.assertEqual(response.json()['service'], {'name': 'Internet', 'slug': 'internet'})
+
+
+class PlanFilterTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_service('Wireless', 'wireless')
+        self.plan_4g = create_wireless_plan('Plan 4G', 'plan4g')
+        self.plan_5g = create_wireless_plan('Plan 5G', 'plan5g')
+        WirelessPlan.objects.filter(pk=self.plan_5g.pk).update(internet_type='5G', data_amount=50)
+
+    def test_list_is_filtered(self):
+        """Tests, that plans are filtered by ranges and facets of the service"""
+        response = self.client.get('/api/wireless/', {'internet_type': '5G,3G', 'max_data_amount': 100})
+
+        self.assertEqual([plan['slug'] for plan in response.json()], ['plan5g'])
+
+    def test_invalid_filters(self):
+        """Tests, that invalid filter values are answered with 400 and an error per param"""
+        response = self.client.get('/api/wireless/', {'internet_type': '6G', 'min_data_amount': 'a lot'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'internet_type', 'min_data_amount'})
+
+    def test_out_of_range_filters(self):
+        """Tests, that filter values, which don't fit the filtered column, are answered with 400"""
+        response = self.client.get('/api/wireless/', {'min_data_amount': '99999999999999999999999'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'min_data_amount'})
+
+
+class ConditionalGetTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_service()
+        self.plan = create_net_plan()
+
+    def test_not_modified_catalogue(self):
+        """Tests, that clients with the current version of the catalogue get 304 without database queries"""
+        response = self.client.get('/api/internet/')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.client.get('/api/internet/', HTTP_IF_NONE_MATCH=etag)
+            not_modified_since = self.client.get('/api/services/', HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified_since.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_changed_catalogue(self):
+        """Tests, that a change of any plan gives clients the new catalogue"""
+        etag = self.client.get('/api/internet/')['ETag']
+
+        self.plan.price = 120
+        self.plan.save()
+        response = self.client.get('/api/internet/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['price'], '120.00')
+
+
+class CatalogueListTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_service()
+        create_service('Wireless', 'wireless')
+        create_service('Television', 'tv')
+        self.net_plan = create_net_plan(price=70)
+        self.wireless_plan = create_wireless_plan()
+        self.tv_plan = create_tv_plan()
+
+    def test_plans_of_all_services_are_listed_with_one_query(self):
+        """Tests, that plans of every service are listed by price with a single query"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/plans/')
+
+        plans = response.json()['results']
+        self.assertEqual(len(queries), 1)
+        prices = [Decimal(plan['price']) for plan in plans]
+        self.assertEqual(prices, sorted(prices))
+        self.assertEqual({plan['service']['slug'] for plan in plans}, {'internet', 'wireless', 'tv'})
+
+    def test_filters_and_ordering(self):
+        """Tests, that plans are filtered by services and price range, and ordered by passed field"""
+        response = self.client.get('/api/plans/', {'service': 'internet,tv', 'ordering': '-price'})
+        self.assertEqual([plan['slug'] for plan in response.json()['results']], [self.tv_plan.slug, self.net_plan.slug])
+
+        response = self.client.get('/api/plans/', {'min_price': 71, 'max_price': 1000})
+        self.assertNotIn(self.net_plan.slug, [plan['slug'] for plan in response.json()['results']])
+
+        self.assertEqual(self.client.get('/api/plans/', {'min_price': 'cheap'}).status_code, 400)
+
+    def test_sparse_fields(self):
+        """Tests, that only requested fields are returned, and pages still follow each other"""
+        response = self.client.get('/api/plans/', {'fields': 'name,price', 'page_size': 2})
+        next_page = self.client.get(response.json()['next']).json()
+
+        self.assertEqual(set(response.json()['results'][0]), {'name', 'price'})
+        self.assertEqual(len(next_page['results']), 1)
+        self.assertEqual(self.client.get('/api/plans/', {'fields': 'name,secret'}).status_code, 400)
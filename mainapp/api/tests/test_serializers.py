@@ -0,0 +1,40 @@
+from django.test import TestCase
+
+from ...models import InternetPlan, WirelessPlan
+from ...tests.test_views import create_service, create_net_plan, create_wireless_plan
+from ..serializers import InternetPlanSerializer, WirelessPlanSerializer, PlanValuesSerializer
+
+
+class PlanSerializerTestCase(TestCase):
+
+    def setUp(self) -> None:
+        create_service()
+        create_service('Wireless', 'wireless')
+        self.net_plan = create_net_plan()
+        self.wireless_plan = create_wireless_plan()
+
+    def test_service_is_nested(self):
+        """Tests, that plan's service is represented by its name and slug"""
+        data = InternetPlanSerializer(self.net_plan).data
+
+        self.assertEqual(data['service'], {'name': 'Internet', 'slug': 'internet'})
+        self.assertNotIn('service_id', data)
+
+    def test_plan_is_created_with_service_id(self):
+        """Tests, that a plan is created with an id of its service"""
+        data = dict(InternetPlanSerializer(self.net_plan).data, slug='net6', service_id=self.net_plan.service_id)
+        serializer = InternetPlanSerializer(data=data)
+
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.save().service, self.net_plan.service)
+
+    def test_values_representation_is_equal_to_serializer_one(self):
+        """Tests, that the values() fast path gives the same data, as the model serializer"""
+        for model, serializer_class in ((InternetPlan, InternetPlanSerializer), (WirelessPlan, WirelessPlanSerializer)):
+            values_serializer = PlanValuesSerializer(serializer_class())
+            rows = model.objects.order_by('id').values(*values_serializer.get_values_fields())
+
+            self.assertEqual(
+                values_serializer.to_representation(rows),
+                [dict(data) for data in serializer_class(model.objects.order_by('id'), many=True).data]
+            )
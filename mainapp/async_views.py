@@ -0,0 +1,86 @@
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+
+from .forms import OrderSubmissionForm
+from .mixins import AsyncViewMixin, AsyncDetailViewMixin, AsyncAnonymousPageCacheMixin
+from .models import Customer
+from .services.asynchronous import database_sync_to_async
+from .services.db_operations import (
+    get_best_plans,
+    get_plan_instance,
+    get_customer,
+    PlanAlreadyOrderedError,
+    ServiceInUseError,
+    CustomerBlockedError
+)
+from .views import (
+    BaseView,
+    ServiceDetailView,
+    PlanDetailView,
+    submit_order,
+    get_order_form_initial,
+    blocked_customer_order
+)
+
+
+class AsyncBaseView(AsyncViewMixin, BaseView):
+    """Async version of BaseView"""
+
+    async def get(self, request, *args, **kwargs):
+        best_plans = await database_sync_to_async(get_best_plans)()
+        return TemplateResponse(request, 'base.html', context={'best_plans': best_plans})
+
+
+class AsyncServiceDetailView(AsyncDetailViewMixin, AsyncAnonymousPageCacheMixin, ServiceDetailView):
+    """Async version of ServiceDetailView"""
+
+
+class AsyncPlanDetailView(AsyncDetailViewMixin, AsyncAnonymousPageCacheMixin, PlanDetailView):
+    """Async version of PlanDetailView"""
+
+
+def get_authenticated_user(request):
+    """Returns user of the request, or None for anonymous visitors"""
+    return request.user if request.user.is_authenticated else None
+
+
+async def order_submission(request, **kwargs):
+    """
+    Async version of order_submission view. The order and its notification mails are saved in one transaction
+    in the thread of the request, templates are rendered there too, as they load the user and customer lazily
+    """
+    user = await database_sync_to_async(get_authenticated_user)(request)
+    if user is None:
+        return redirect_to_login(request.get_full_path())
+
+    plan = await database_sync_to_async(get_plan_instance)(kwargs.get('s_slug'), kwargs.get('p_slug'))
+
+    if request.method == 'POST':
+        order_form = OrderSubmissionForm(request.POST, initial={'plan': plan.name})
+        if order_form.is_valid():
+            try:
+                await database_sync_to_async(submit_order)(plan, user, order_form.cleaned_data)
+            except PlanAlreadyOrderedError:
+                messages.add_message(request, messages.INFO, 'You have already ordered this plan.')
+                return redirect('account')
+            except ServiceInUseError:
+                return redirect('service_in_use_order')
+            except CustomerBlockedError:
+                return blocked_customer_order(request)
+
+            messages.add_message(request, messages.SUCCESS, 'A mail with instructions was sent to your email!')
+            return redirect('home')
+    else:
+        customer = await database_sync_to_async(get_customer)(user)
+        if customer.status == Customer.BLOCKED:
+            return blocked_customer_order(request)
+        order_form = OrderSubmissionForm(initial=get_order_form_initial(plan, user, customer))
+
+    context = {
+        'order_form': order_form,
+        'plan': plan
+    }
+
+    return TemplateResponse(request, 'mainapp/order_plan.html', context=context)
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# cache backends, that keep data in memory of a process, so workers don't see each other's changes
+PROCESS_LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Reports the default cache, if it's local to a process, while a shared cache is required.
+    Otherwise cached catalogue data and its version differ between workers, and a worker serves stale plans and prices
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if not settings.SHARED_CACHE_REQUIRED or backend not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        f'The default cache uses {backend}, which is local to a process, so catalogue changes '
+        f'are not seen by other workers.',
+        hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared cache, e.g. Redis or Memcached.',
+        id='mainapp.E001',
+    )]
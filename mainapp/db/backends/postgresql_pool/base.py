@@ -0,0 +1,51 @@
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from mainapp.db.pool import ConnectionPool, get_pool
+
+
+def is_connection_usable(connection) -> bool:
+    """Checks, that a psycopg2 connection answers, the check doesn't leave a transaction open"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+    except base.Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend, that takes connections from an in-process pool of the worker and returns them there
+    instead of closing, so a request doesn't pay for a TCP connection and authentication.
+    Pool is configured by POOL dict of the database settings: MAX_SIZE, TIMEOUT (seconds to wait for a free
+    connection) and HEALTH_CHECK_INTERVAL (seconds a connection can stay idle before it's checked)
+    """
+
+    def get_pool(self, conn_params: dict = None) -> ConnectionPool:
+        options = self.settings_dict.get('POOL', {})
+        conn_params = conn_params or self.get_connection_params()
+        return get_pool(self.alias, lambda: ConnectionPool(
+            connect=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            check=is_connection_usable,
+            close=lambda connection: connection.close(),
+            max_size=options.get('MAX_SIZE', 10),
+            timeout=options.get('TIMEOUT', 5),
+            health_check_interval=options.get('HEALTH_CHECK_INTERVAL', 30)
+        ))
+
+    def get_new_connection(self, conn_params):
+        return self.get_pool(conn_params).acquire()
+
+    def _close(self):
+        connection = self.connection
+        broken = bool(connection.closed)
+        if not broken and connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            # a connection goes back to the pool without a transaction, that was left open, e.g. by an error
+            try:
+                connection.rollback()
+            except base.Database.Error:
+                broken = True
+        self.get_pool().release(connection, discard=broken)
@@ -0,0 +1,82 @@
+import time
+
+from django.conf import settings
+from django.db import connections, DatabaseError
+
+from .pool import get_pools_stats
+
+# the last result of pinging all databases by the worker, and when it was got
+_last_health_check = {'ok': False, 'checked_at': None}
+
+
+def ping_database(alias: str) -> dict:
+    """Runs a trivial query on passed database, returns whether it answered and its latency"""
+    connection = connections[alias]
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError as error:
+        return {'ok': False, 'error': str(error)}
+    return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 3)}
+
+
+def measure_connection_setup(alias: str) -> float:
+    """
+    Returns seconds it takes to get a new connection to passed database, with a pooling backend it's the time
+    to get one from the pool. It's measured on a separate connection, so the one of the thread stays untouched
+    """
+    connection = connections.create_connection(alias)
+    started = time.perf_counter()
+    try:
+        connection.ensure_connection()
+        return time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def get_database_health() -> dict:
+    """Returns ping results and connection settings of every database, and statistics of connection pools"""
+    return {
+        'databases': {
+            alias: {
+                **ping_database(alias),
+                'engine': connections[alias].settings_dict['ENGINE'],
+                'conn_max_age': connections[alias].settings_dict['CONN_MAX_AGE'],
+            }
+            for alias in connections
+        },
+        'pools': get_pools_stats()
+    }
+
+
+def are_databases_healthy() -> bool:
+    """
+    Returns whether every database answers. A worker pings databases at most once
+    per DB_HEALTH_ENDPOINT_INTERVAL seconds, so frequent probes don't add load to databases
+    """
+    now = time.monotonic()
+    checked_at = _last_health_check['checked_at']
+    if checked_at is None or now - checked_at >= settings.DB_HEALTH_ENDPOINT_INTERVAL:
+        _last_health_check.update(ok=all(ping_database(alias)['ok'] for alias in connections), checked_at=now)
+    return _last_health_check['ok']
+
+
+def check_persistent_connections(**kwargs) -> None:
+    """
+    Closes persistent connections, that don't answer, when a request starts, so it opens a new one instead
+    of failing on a connection dropped by the database or a proxy. A connection is checked once
+    per DB_HEALTH_CHECK_INTERVAL seconds, connections in a transaction are left alone
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None or not connection.settings_dict['CONN_MAX_AGE'] or connection.in_atomic_block:
+            continue
+        checked_connection, checked_at = getattr(connection, 'health_check', (None, None))
+        if checked_connection is not connection.connection:
+            # a new connection is healthy, its check is due in an interval
+            connection.health_check = (connection.connection, now)
+        elif now - checked_at > settings.DB_HEALTH_CHECK_INTERVAL:
+            if not connection.is_usable():
+                connection.close()
+            connection.health_check = (connection.connection, now)
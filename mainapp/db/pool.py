@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection of the pool is free in time"""
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of database connections of one database, shared by threads of a worker process.
+    Up to 'max_size' connections are opened on demand, a thread waits up to 'timeout' seconds for a free one.
+    Connections, that stayed idle longer than 'health_check_interval' seconds, are checked before they're handed out,
+    and broken ones are replaced. The most recently released connection is reused first, so rarely needed ones
+    stay idle. 'connect', 'check' and 'close' are callables, that open, check and close a connection
+    """
+
+    def __init__(self, connect, check, close, max_size: int = 10, timeout: float = 5,
+                 health_check_interval: float = 30):
+        self.connect = connect
+        self.check = check
+        self.close = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self.condition = threading.Condition()
+        self.idle = deque()  # (connection, time it was released)
+        self.size = 0
+        self.in_use = 0
+        self.waiting = 0
+
+        self.acquired = 0
+        self.timeouts = 0
+        self.opened = 0
+        self.discarded = 0
+        self.health_check_failures = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def acquire(self):
+        """Returns a free connection, opening a new one, if there's none, raises PoolTimeout, if the pool is full"""
+        started = time.monotonic()
+        with self.condition:
+            self.waiting += 1
+            try:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = started + self.timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f'No free connection among {self.max_size} in {self.timeout}s')
+                    self.condition.wait(remaining)
+
+                connection, released_at = self.idle.pop() if self.idle else (None, None)
+                if connection is None:
+                    self.size += 1
+                self.in_use += 1
+            finally:
+                self.waiting -= 1
+
+            wait_time = time.monotonic() - started
+            self.acquired += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        # connecting and checking take a round trip to the database, so they're done without holding the lock
+        try:
+            if connection is not None and time.monotonic() - released_at > self.health_check_interval:
+                if not self.check(connection):
+                    logger.warning('Pooled connection failed a health check and is replaced')
+                    self.health_check_failures += 1
+                    self.close_quietly(connection)
+                    connection = None
+            if connection is None:
+                connection = self.connect()
+                self.opened += 1
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.in_use -= 1
+                self.condition.notify()
+            raise
+        return connection
+
+    def release(self, connection, discard: bool = False) -> None:
+        """Returns a connection to the pool, or closes it, if it's 'discard'ed, e.g. as it's broken"""
+        with self.condition:
+            self.in_use -= 1
+            if discard:
+                self.size -= 1
+                self.discarded += 1
+            else:
+                self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+        if discard:
+            self.close_quietly(connection)
+
+    def close_quietly(self, connection) -> None:
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def close_idle(self) -> int:
+        """Closes all idle connections, returns their amount"""
+        with self.condition:
+            idle = list(self.idle)
+            self.idle.clear()
+            self.size -= len(idle)
+            self.condition.notify_all()
+        for connection, _ in idle:
+            self.close_quietly(connection)
+        return len(idle)
+
+    def get_stats(self) -> dict:
+        """Returns current state of the pool and its wait time statistics, saturation is a share of busy connections"""
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'saturation': round(self.in_use / self.max_size, 3),
+                'acquired': self.acquired,
+                'timeouts': self.timeouts,
+                'opened': self.opened,
+                'discarded': self.discarded,
+                'health_check_failures': self.health_check_failures,
+                'avg_wait_ms': round(self.wait_time / self.acquired * 1000, 3) if self.acquired else 0,
+                'max_wait_ms': round(self.max_wait_time * 1000, 3),
+            }
+
+
+# pools of the worker process per database alias
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, create) -> ConnectionPool:
+    """Returns the pool of passed database alias, it's created by 'create' callable on the first call"""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = create()
+        return _pools[alias]
+
+
+def get_pools_stats() -> dict:
+    """Returns statistics of every pool of the worker process by database alias"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.get_stats() for alias, pool in pools.items()}
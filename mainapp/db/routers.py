@@ -0,0 +1,48 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# reads of the current request or task are pinned to the primary database, e.g. as the client has just written
+pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+# the current request or task has written to the primary database, so its reads have to see that
+wrote_to_primary = ContextVar('wrote_to_primary', default=False)
+
+
+def is_pinned_to_primary() -> bool:
+    """Checks, whether reads have to go to the primary database to see writes, that replicas may not have yet"""
+    return pinned_to_primary.get() or wrote_to_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+@contextmanager
+def use_primary():
+    """Sends all reads of the block to the primary database"""
+    token = pinned_to_primary.set(True)
+    try:
+        yield
+    finally:
+        pinned_to_primary.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a random database of DATABASE_REPLICAS, and writes to the primary (default) one.
+    Reads stay on the primary, where they have to see the latest writes: in a transaction, after a write
+    in the same request or task, and for a while after a write of the same client (see ReplicaStickinessMiddleware).
+    Without replicas everything goes to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or is_pinned_to_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        wrote_to_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas are copies of the primary, so objects of all of them can be related
+        return True
@@ -4,7 +4,8 @@ from django import forms
 class OrderSubmissionForm(forms.Form):
     """Form for filling info about customer's details for order"""
 
-    plan = forms.CharField()
+    # the plan is taken from the order url, so the field is only shown to the customer
+    plan = forms.CharField(disabled=True)
     first_name = forms.CharField()
     last_name = forms.CharField()
     email = forms.EmailField()
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment, override_settings
+
+from mainapp.services.benchmarks import seed_benchmark_data, run_view_benchmarks
+from mainapp.services.datagen import DEFAULT_SEED
+
+
+# benchmarks use their own cache, so pages and plans of the rolled back data don't get into the shared cache
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-views',
+    }
+}
+
+
+class RollBack(Exception):
+    """Raised to roll back seeded benchmark data"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds plans and customers, measures query count, latency and memory of every view, '
+        'and fails if a budget is exceeded. Seeded data is rolled back afterwards, '
+        'and an isolated local memory cache is used, so the shared cache is left intact'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans-per-service', type=int, default=2000)
+        parser.add_argument('--customers', type=int, default=100000)
+        parser.add_argument(
+            '--max-cart-size', type=int, default=3,
+            help='Max amount of ordered plans of a customer, at most one of every service'
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Amount of measured requests to every view')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+        parser.add_argument('--skip-latency', action='store_true', help='Check query budgets only')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES), transaction.atomic():
+                self.stdout.write('Seeding benchmark data...')
+                data = seed_benchmark_data(
+                    options['plans_per_service'], options['customers'], options['max_cart_size'], options['seed']
+                )
+                results = run_view_benchmarks(data, options['repeat'])
+                raise RollBack
+        except RollBack:
+            pass
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f'{"view":<24}{"queries":>8}{"p50, ms":>10}{"p95, ms":>10}{"peak, KiB":>12}')
+        violations = []
+        for result in results:
+            self.stdout.write(
+                f'{result.name:<24}{result.queries:>8}{result.p50:>10.1f}{result.p95:>10.1f}'
+                f'{result.peak_memory / 1024:>12.1f}'
+            )
+            violations += result.get_violations(check_latency=not options['skip_latency'])
+
+        if violations:
+            raise CommandError('Budgets exceeded:\n' + '\n'.join(violations))
+        self.stdout.write(self.style.SUCCESS('All views are within their budgets'))
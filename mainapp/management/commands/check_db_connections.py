@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from mainapp.db.health import get_database_health, measure_connection_setup
+
+
+class Command(BaseCommand):
+    help = 'Checks, that databases answer, and measures how long it takes to open a connection and to run a query'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Amount of connections opened to measure setup time')
+
+    def handle(self, *args, **options):
+        health = get_database_health()
+        for alias in connections:
+            setup_times = sorted(measure_connection_setup(alias) for _ in range(options['repeat']))
+            health['databases'][alias]['connection_setup_ms'] = {
+                'min': round(setup_times[0] * 1000, 3),
+                'median': round(setup_times[len(setup_times) // 2] * 1000, 3),
+                'max': round(setup_times[-1] * 1000, 3),
+            }
+        self.stdout.write(json.dumps(health, indent=2))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mainapp.models import OrderedPlan
+from mainapp.services.datagen import generate_data, DEFAULT_SEED, GENERATED_PASSWORD
+
+
+class Command(BaseCommand):
+    help = (
+        'Populates the database with synthetic services, plans, customers and their carts for load testing. '
+        'Rows are loaded by COPY on PostgreSQL and by batched bulk inserts on other databases'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans-per-service', type=int, default=1000)
+        parser.add_argument('--customers', type=int, default=100000)
+        parser.add_argument(
+            '--max-cart-size', type=int, default=3,
+            help='Max amount of ordered plans of a customer, at most one of every service'
+        )
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='The same seed generates the same data')
+        parser.add_argument('--prefix', default='gen', help='Prefix of generated usernames and plan slugs')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Amount of customers loaded at once')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        ordered_before = OrderedPlan.objects.count()
+        generate_data(
+            options['plans_per_service'], options['customers'], options['max_cart_size'],
+            options['seed'], options['prefix'], options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {options["plans_per_service"]} plans per service, {options["customers"]} customers '
+            f'and {OrderedPlan.objects.count() - ordered_before} ordered plans '
+            f'in {time.perf_counter() - started:.1f}s. Password of generated users is "{GENERATED_PASSWORD}"'
+        ))
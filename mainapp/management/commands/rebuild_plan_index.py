@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mainapp.services.catalogue import rebuild_plan_index
+
+
+class Command(BaseCommand):
+    help = 'Recreates the denormalized plan catalogue from the plan tables of all services'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Amount of entries inserted per query')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created = rebuild_plan_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Plan catalogue rebuilt: {created} entries'))
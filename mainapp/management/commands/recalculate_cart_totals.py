@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from mainapp.services.db_operations import recalculate_cart_totals
+
+
+class Command(BaseCommand):
+    help = 'Recomputes totals of all ordered plan lists from current prices of their plans'
+
+    def handle(self, *args, **options):
+        updated = recalculate_cart_totals()
+        self.stdout.write(self.style.SUCCESS(f'Totals of {updated} ordered plan lists recalculated'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from mainapp.services.db_operations import refresh_best_plans
+
+
+class Command(BaseCommand):
+    help = 'Ranks best plans by popularity and price and stores them in cache for the main page'
+
+    def handle(self, *args, **options):
+        best_plans = refresh_best_plans()
+        names = ', '.join(plan.name for plan in best_plans if plan is not None)
+        self.stdout.write(self.style.SUCCESS(f'Best plans refreshed: {names}'))
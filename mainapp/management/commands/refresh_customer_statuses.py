@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from mainapp.services.billing import refresh_customer_statuses
+
+
+class Command(BaseCommand):
+    help = 'Blocks customers, that owe money, and unblocks paid up ones, among accounts changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Amount of accounts re-evaluated in one transaction')
+
+    def handle(self, *args, **options):
+        stats = refresh_customer_statuses(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Customers blocked: {stats["blocked"]}, unblocked: {stats["unblocked"]}'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mainapp.services.billing import run_billing_cycle, get_billing_period
+
+
+class Command(BaseCommand):
+    help = 'Charges all customers for their confirmed ordered plans, resuming an interrupted billing cycle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', default=None, help='Billing period in YYYY-MM format, current month by default')
+        parser.add_argument('--chunk-size', type=int, help='Amount of customers billed in one transaction')
+
+    def handle(self, *args, **options):
+        period = options['period'] or get_billing_period()
+        if len(period) != 7 or period[4] != '-' or not (period[:4] + period[5:]).isdigit():
+            raise CommandError(f'Invalid period "{period}", expected YYYY-MM')
+
+        billing_run = run_billing_cycle(period, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Billing for {billing_run.period} finished: {billing_run.billed_customers} customers charged'
+        ))
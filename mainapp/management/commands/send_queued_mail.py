@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mainapp.services.mailing import send_queued_mails
+
+
+class Command(BaseCommand):
+    help = 'Delivers due mails from the outbox, retrying failed ones with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Amount of queued mails claimed and sent in one batch, MAIL_QUEUE_BATCH_SIZE by default. '
+                 'Connection reuse is set by MAIL_CONNECTION_BATCH_SIZE'
+        )
+        parser.add_argument('--max-attempts', type=int, help='Amount of failed attempts before a mail is dead')
+        parser.add_argument('--watch', action='store_true', help='Keep polling the outbox after it is drained')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls in watch mode')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = send_queued_mails(options['batch_size'], options['max_attempts'])
+            if stats['sent'] or stats['retried'] or stats['dead']:
+                self.stdout.write(
+                    f'Sent: {stats["sent"]}, retried: {stats["retried"]}, dead: {stats["dead"]}, '
+                    f'{stats["throughput"]:.1f} mails/s'
+                )
+                continue
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,174 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+from .db.routers import pinned_to_primary, wrote_to_primary
+from .services.caching import get_catalogue_state
+
+logger = logging.getLogger(__name__)
+
+# statistics of the request, that is being instrumented in the current thread or task
+current_stats = ContextVar('current_stats', default=None)
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def get_query_fingerprint(sql: str) -> str:
+    """
+    Returns the shape of passed query. Parameters are passed separately from sql, so only IN lists,
+    which are different for every amount of values, have to be collapsed
+    """
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+class RequestStats:
+    """SQL queries and template rendering time of a single request"""
+
+    def __init__(self):
+        self.fingerprints = Counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Records a query, it's installed as an execute wrapper of every database connection"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[get_query_fingerprint(sql)] += 1
+
+    def get_repeated_queries(self) -> list:
+        """Returns (fingerprint, count) of queries, that were made more than once, the most repeated go first"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+
+def instrument_template_rendering() -> None:
+    """Makes rendering of Django templates add its time to statistics of the instrumented request"""
+    if getattr(Template.render, 'instrumented', False):
+        return
+    original_render = Template.render
+
+    @wraps(original_render)
+    def render(self, *args, **kwargs):
+        stats = current_stats.get()
+        if stats is None:
+            return original_render(self, *args, **kwargs)
+
+        # templates, rendered from other templates (e.g. crispy forms), are counted within the outer one
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original_render(self, *args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - started
+
+    render.instrumented = True
+    Template.render = render
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records query count, database time, repeated query shapes and template rendering time of requests
+    to views of SQL_INSTRUMENTATION_VIEW_MODULES, and reports them in Server-Timing header and a log line.
+    Query shapes, repeated SQL_INSTRUMENTATION_REPEAT_THRESHOLD times or more, are logged as a warning,
+    as they're usually N+1 queries. Enabled by SQL_INSTRUMENTATION setting
+    """
+
+    def __init__(self, get_response):
+        if not settings.SQL_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        instrument_template_rendering()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        request.sql_stats = None
+        token = current_stats.set(stats)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+
+        if request.sql_stats is stats:
+            self.report(request, response, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if view_func.__module__ in settings.SQL_INSTRUMENTATION_VIEW_MODULES:
+            request.sql_stats = current_stats.get()
+            request.sql_view_name = f'{view_func.__module__}.{view_func.__name__}'
+
+    def report(self, request, response, stats: RequestStats) -> None:
+        repeated = stats.get_repeated_queries()
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'dup;desc="{len(repeated)} repeated query shapes"'
+        ])
+
+        is_suspicious = any(count >= settings.SQL_INSTRUMENTATION_REPEAT_THRESHOLD for _, count in repeated)
+        logger.log(logging.WARNING if is_suspicious else logging.INFO, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': request.sql_view_name,
+            'status': response.status_code,
+            'queries': stats.queries,
+            'db_ms': round(stats.db_time * 1000, 1),
+            'template_ms': round(stats.template_time * 1000, 1),
+            'repeated_queries': [{'sql': sql, 'count': count} for sql, count in repeated[:5]],
+            'n_plus_one': is_suspicious
+        }))
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Keeps reads of a client on the primary database for REPLICA_STICKINESS_SECONDS after a request of the client
+    wrote something, so e.g. a customer sees the plan, that was just ordered, before replicas catch up.
+    The pin is kept in a cookie, so it doesn't take a session lookup. Reads of all clients go to the primary
+    for the same time after the catalogue changes, so pages cached in that time don't have stale plans.
+    Enabled, when DATABASE_REPLICAS are configured
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (
+            settings.REPLICA_STICKINESS_COOKIE in request.COOKIES
+            or time.time() - get_catalogue_state()[1] < settings.REPLICA_STICKINESS_SECONDS
+        )
+        pinned_token, wrote_token = pinned_to_primary.set(pinned), wrote_to_primary.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = wrote_to_primary.get()
+        finally:
+            pinned_to_primary.reset(pinned_token)
+            wrote_to_primary.reset(wrote_token)
+
+        if wrote:
+            response.set_cookie(
+                settings.REPLICA_STICKINESS_COOKIE, '1', max_age=settings.REPLICA_STICKINESS_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
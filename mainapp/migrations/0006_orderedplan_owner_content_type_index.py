@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0005_auto_20210522_1900'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderedplan',
+            index=models.Index(fields=['owner', 'content_type', 'object_id'], name='orderedplan_owner_ct_obj_idx'),
+        ),
+    ]
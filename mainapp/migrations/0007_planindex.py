@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 12:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('mainapp', '0006_orderedplan_owner_content_type_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('slug', models.SlugField(db_index=False)),
+                ('name', models.CharField(max_length=255)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=9)),
+                ('headline_metric', models.IntegerField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='mainapp.service')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='planindex',
+            index=models.Index(fields=['service', 'slug'], name='planindex_service_slug_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planindex',
+            index=models.Index(fields=['service', 'price'], name='planindex_service_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planindex',
+            index=models.Index(fields=['price', 'id'], name='planindex_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planindex',
+            index=models.Index(fields=['name', 'id'], name='planindex_name_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='planindex',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='planindex_unique_plan'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+PLAN_MODEL__HEADLINE_FIELD = {
+    'internetplan': 'speed',
+    'wirelessplan': 'data_amount',
+    'tvplan': 'channels_amount',
+}
+
+
+def backfill_plan_index(apps, schema_editor):
+    """Fills the plan catalogue with index entries of already existing plans"""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    PlanIndex = apps.get_model('mainapp', 'PlanIndex')
+    db_alias = schema_editor.connection.alias
+
+    for model_name, headline_field in PLAN_MODEL__HEADLINE_FIELD.items():
+        model = apps.get_model('mainapp', model_name)
+        if not model.objects.using(db_alias).exists():
+            continue
+        content_type, _ = ContentType.objects.using(db_alias).get_or_create(app_label='mainapp', model=model_name)
+        PlanIndex.objects.using(db_alias).bulk_create(
+            [
+                PlanIndex(
+                    service_id=plan.service_id,
+                    content_type=content_type,
+                    object_id=plan.id,
+                    slug=plan.slug,
+                    name=plan.name,
+                    price=plan.price,
+                    headline_metric=getattr(plan, headline_field)
+                )
+                for plan in model.objects.using(db_alias).iterator()
+            ],
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0007_planindex'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_plan_index, migrations.RunPython.noop),
+    ]
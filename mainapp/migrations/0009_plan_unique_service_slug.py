@@ -0,0 +1,62 @@
+# Generated by Django 3.2 on 2026-10-18 12:38
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+PLAN_MODELS = ('internetplan', 'tvplan', 'wirelessplan')
+
+
+def rename_duplicate_plan_slugs(apps, schema_editor):
+    """
+    Keeps the slug of the earliest plan of every service's slug, that several plans share,
+    other plans get the slug suffixed with their id, and their catalogue entries are renamed too
+    """
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    PlanIndex = apps.get_model('mainapp', 'PlanIndex')
+    db_alias = schema_editor.connection.alias
+
+    for model_name in PLAN_MODELS:
+        model = apps.get_model('mainapp', model_name)
+        plans = model.objects.using(db_alias)
+        duplicates = (
+            plans.values('service', 'slug').annotate(first_id=Min('id'), amount=Count('id')).filter(amount__gt=1)
+        )
+        content_type = ContentType.objects.using(db_alias).filter(app_label='mainapp', model=model_name).first()
+        slug_length = model._meta.get_field('slug').max_length
+        for duplicate in duplicates:
+            for plan in plans.filter(
+                service=duplicate['service'], slug=duplicate['slug'], id__gt=duplicate['first_id']
+            ).order_by('id'):
+                suffix, number = f'-{plan.id}', 1
+                slug = f'{plan.slug[:slug_length - len(suffix)]}{suffix}'
+                while plans.filter(service=plan.service_id, slug=slug).exists():
+                    suffix, number = f'-{plan.id}-{number}', number + 1
+                    slug = f'{plan.slug[:slug_length - len(suffix)]}{suffix}'
+                plans.filter(id=plan.id).update(slug=slug)
+                if content_type is not None:
+                    PlanIndex.objects.using(db_alias).filter(content_type=content_type, object_id=plan.id).update(
+                        slug=slug
+                    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0008_backfill_planindex'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_plan_slugs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='internetplan',
+            constraint=models.UniqueConstraint(fields=('service', 'slug'), name='internetplan_unique_service_slug'),
+        ),
+        migrations.AddConstraint(
+            model_name='tvplan',
+            constraint=models.UniqueConstraint(fields=('service', 'slug'), name='tvplan_unique_service_slug'),
+        ),
+        migrations.AddConstraint(
+            model_name='wirelessplan',
+            constraint=models.UniqueConstraint(fields=('service', 'slug'), name='wirelessplan_unique_service_slug'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0009_plan_unique_service_slug'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderedplan',
+            index=models.Index(fields=['content_type', 'object_id'], name='orderedplan_type_object_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0010_orderedplan_type_object_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='internetplan',
+            index=models.Index(fields=['price', 'id'], name='internetplan_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internetplan',
+            index=models.Index(fields=['name', 'id'], name='internetplan_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internetplan',
+            index=models.Index(fields=['speed', 'id'], name='internetplan_speed_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tvplan',
+            index=models.Index(fields=['price', 'id'], name='tvplan_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tvplan',
+            index=models.Index(fields=['name', 'id'], name='tvplan_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tvplan',
+            index=models.Index(fields=['channels_amount', 'id'], name='tvplan_channels_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wirelessplan',
+            index=models.Index(fields=['price', 'id'], name='wirelessplan_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wirelessplan',
+            index=models.Index(fields=['name', 'id'], name='wirelessplan_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wirelessplan',
+            index=models.Index(fields=['data_amount', 'id'], name='wirelessplan_data_id_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-18 12:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_ordered_plans(apps, schema_editor):
+    """Keeps only the earliest ordered plan of every customer's plan, that was ordered several times"""
+    OrderedPlan = apps.get_model('mainapp', 'OrderedPlan')
+    db_alias = schema_editor.connection.alias
+    duplicates = (
+        OrderedPlan.objects.using(db_alias).values('owner', 'content_type', 'object_id')
+        .annotate(first_id=Min('id'), amount=Count('id'))
+        .filter(amount__gt=1)
+    )
+    for duplicate in duplicates:
+        OrderedPlan.objects.using(db_alias).filter(
+            owner=duplicate['owner'],
+            content_type=duplicate['content_type'],
+            object_id=duplicate['object_id'],
+            id__gt=duplicate['first_id']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0012_queuedmail'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_ordered_plans, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='orderedplan',
+            name='orderedplan_owner_ct_obj_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='orderedplan',
+            constraint=models.UniqueConstraint(fields=('owner', 'content_type', 'object_id'), name='orderedplan_unique_owner_plan'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 12:43
+
+from django.db import migrations
+from django.db.models import F
+
+
+def reconcile_ordered_plan_lists(apps, schema_editor):
+    """
+    Points every ordered plan, that is linked to a list through the removed many-to-many field,
+    at that list by its foreign key, which becomes the only link between them
+    """
+    OrderedPlansList = apps.get_model('mainapp', 'OrderedPlansList')
+    OrderedPlan = apps.get_model('mainapp', 'OrderedPlan')
+    db_alias = schema_editor.connection.alias
+    links = (
+        OrderedPlansList.plans.through.objects.using(db_alias)
+        .exclude(orderedplan__related_list=F('orderedplanslist'))
+        .values_list('orderedplan_id', 'orderedplanslist_id')
+    )
+    for ordered_plan_id, plan_list_id in links:
+        OrderedPlan.objects.using(db_alias).filter(id=ordered_plan_id).update(related_list_id=plan_list_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0013_orderedplan_unique_owner_plan'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconcile_ordered_plan_lists, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='orderedplanslist',
+            name='plans',
+        ),
+    ]
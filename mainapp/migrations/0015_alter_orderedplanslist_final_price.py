@@ -0,0 +1,46 @@
+# Generated by Django 3.2 on 2026-10-18 12:44
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def fill_cart_totals(apps, schema_editor):
+    """Fills totals of ordered plan lists, which weren't maintained before, from prices of their plans"""
+    OrderedPlansList = apps.get_model('mainapp', 'OrderedPlansList')
+    OrderedPlan = apps.get_model('mainapp', 'OrderedPlan')
+    db_alias = schema_editor.connection.alias
+
+    prices = {}
+    for model_name in ('internetplan', 'wirelessplan', 'tvplan'):
+        model = apps.get_model('mainapp', model_name)
+        prices.update(
+            ((model_name, plan_id), price) for plan_id, price in model.objects.using(db_alias).values_list('id', 'price')
+        )
+
+    totals = defaultdict(Decimal)
+    ordered_plans = OrderedPlan.objects.using(db_alias).values_list('related_list_id', 'content_type__model', 'object_id')
+    for plan_list_id, model_name, object_id in ordered_plans.iterator():
+        totals[plan_list_id] += prices.get((model_name, object_id), 0)
+
+    plan_lists = list(OrderedPlansList.objects.using(db_alias).filter(id__in=totals))
+    for plan_list in plan_lists:
+        plan_list.final_price = totals[plan_list.id]
+    OrderedPlansList.objects.using(db_alias).bulk_update(plan_lists, ['final_price'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0014_remove_orderedplanslist_plans'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderedplanslist',
+            name='final_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=9),
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
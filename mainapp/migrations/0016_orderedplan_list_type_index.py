@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0015_alter_orderedplanslist_final_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderedplan',
+            index=models.Index(fields=['related_list', 'content_type'], name='orderedplan_list_type_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0017_billing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='status_dirty',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(condition=models.Q(status_dirty=True), fields=['id'], name='account_status_dirty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(status='blocked'), fields=['user'], name='customer_blocked_user_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-18 13:09
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_plan_index_details(apps, schema_editor):
+    """Copies days to connect and descriptions of plans to their catalogue entries"""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    PlanIndex = apps.get_model('mainapp', 'PlanIndex')
+    db_alias = schema_editor.connection.alias
+
+    for model_name in ('internetplan', 'wirelessplan', 'tvplan'):
+        content_type = ContentType.objects.using(db_alias).filter(app_label='mainapp', model=model_name).first()
+        if content_type is None:
+            continue
+        plans = apps.get_model('mainapp', model_name).objects.filter(id=OuterRef('object_id'))
+        PlanIndex.objects.using(db_alias).filter(content_type=content_type).update(
+            days_to_connect=Subquery(plans.values('days_to_connect')[:1]),
+            description=Subquery(plans.values('description')[:1])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0018_customer_status_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planindex',
+            name='days_to_connect',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='planindex',
+            name='description',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(fill_plan_index_details, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 3.2 on 2026-10-18 13:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# name, service name and description of the plan, weighted in this order
+SEARCH_VECTOR_SQL = """
+    ALTER TABLE mainapp_planindex ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(service_name, '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'C')
+    ) STORED;
+    CREATE INDEX planindex_search_vector_idx ON mainapp_planindex USING GIN (search_vector);
+"""
+
+DROP_SEARCH_VECTOR_SQL = 'ALTER TABLE mainapp_planindex DROP COLUMN search_vector;'
+
+
+def fill_plan_index_search_fields(apps, schema_editor):
+    """Copies service names and facet fields of plans to their catalogue entries"""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    PlanIndex = apps.get_model('mainapp', 'PlanIndex')
+    Service = apps.get_model('mainapp', 'Service')
+    db_alias = schema_editor.connection.alias
+
+    service_names = Service.objects.filter(id=OuterRef('service_id')).values('name')
+    PlanIndex.objects.using(db_alias).update(service_name=Subquery(service_names[:1]))
+    for model_name, field in (('wirelessplan', 'internet_type'), ('tvplan', 'quality')):
+        content_type = ContentType.objects.using(db_alias).filter(app_label='mainapp', model=model_name).first()
+        if content_type is None:
+            continue
+        plans = apps.get_model('mainapp', model_name).objects.filter(id=OuterRef('object_id'))
+        PlanIndex.objects.using(db_alias).filter(content_type=content_type).update(
+            **{field: Subquery(plans.values(field)[:1])}
+        )
+
+
+def add_search_vector(apps, schema_editor):
+    """Adds the full-text search column, it's maintained by PostgreSQL itself, other databases search without it"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0019_planindex_details'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planindex',
+            name='internet_type',
+            field=models.CharField(blank=True, max_length=2, null=True),
+        ),
+        migrations.AddField(
+            model_name='planindex',
+            name='quality',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='planindex',
+            name='service_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(fill_plan_index_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0020_plan_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tvplan',
+            index=models.Index(fields=['quality', 'price', 'id'], name='tvplan_quality_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tvplan',
+            index=models.Index(fields=['quality', 'channels_amount', 'id'], name='tvplan_quality_channels_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wirelessplan',
+            index=models.Index(fields=['internet_type', 'price', 'id'], name='wirelessplan_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wirelessplan',
+            index=models.Index(fields=['internet_type', 'data_amount', 'id'], name='wirelessplan_type_data_idx'),
+        ),
+    ]
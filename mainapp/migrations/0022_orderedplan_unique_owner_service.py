@@ -0,0 +1,68 @@
+# Generated by Django 3.2 on 2026-10-18 14:10
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_extra_ordered_plans_of_service(apps, schema_editor):
+    """
+    Keeps only the earliest ordered plan of every customer's service, that has several ordered plans,
+    and recomputes totals of ordered plan lists, which plans were deleted
+    """
+    OrderedPlan = apps.get_model('mainapp', 'OrderedPlan')
+    OrderedPlansList = apps.get_model('mainapp', 'OrderedPlansList')
+    db_alias = schema_editor.connection.alias
+    ordered_plans = OrderedPlan.objects.using(db_alias)
+
+    duplicates = (
+        ordered_plans.values('owner', 'content_type').annotate(first_id=Min('id'), amount=Count('id'))
+        .filter(amount__gt=1)
+    )
+    changed_list_ids = set()
+    for duplicate in duplicates:
+        extra = ordered_plans.filter(
+            owner=duplicate['owner'], content_type=duplicate['content_type'], id__gt=duplicate['first_id']
+        )
+        changed_list_ids.update(extra.values_list('related_list_id', flat=True))
+        extra.delete()
+    if not changed_list_ids:
+        return
+
+    prices = {}
+    for model_name in ('internetplan', 'wirelessplan', 'tvplan'):
+        model = apps.get_model('mainapp', model_name)
+        plans = model.objects.using(db_alias).values_list('id', 'price')
+        prices.update(((model_name, plan_id), price) for plan_id, price in plans)
+    totals = defaultdict(Decimal)
+    for plan_list_id, model_name, object_id in ordered_plans.filter(related_list_id__in=changed_list_ids).values_list(
+        'related_list_id', 'content_type__model', 'object_id'
+    ):
+        totals[plan_list_id] += prices.get((model_name, object_id), 0)
+    plan_lists = list(OrderedPlansList.objects.using(db_alias).filter(id__in=changed_list_ids))
+    for plan_list in plan_lists:
+        plan_list.final_price = totals[plan_list.id]
+    OrderedPlansList.objects.using(db_alias).bulk_update(plan_lists, ['final_price'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0021_plan_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_extra_ordered_plans_of_service, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='orderedplan',
+            name='orderedplan_unique_owner_plan',
+        ),
+        migrations.AddConstraint(
+            model_name='orderedplan',
+            constraint=models.UniqueConstraint(
+                fields=('owner', 'content_type'), name='orderedplan_unique_owner_service'
+            ),
+        ),
+    ]
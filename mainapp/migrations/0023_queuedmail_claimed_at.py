@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0022_orderedplan_unique_owner_service'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedmail',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='queuedmail',
+            name='status',
+            field=models.CharField(
+                choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('dead', 'Dead')],
+                default='pending', max_length=10
+            ),
+        ),
+    ]
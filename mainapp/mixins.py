@@ -1,8 +1,18 @@
+import asyncio
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.views.generic.detail import SingleObjectMixin
 
 from .models import Service, TVPlan, WirelessPlan, InternetPlan
 
 from .services import db_operations
+from .services.asynchronous import database_sync_to_async
+from .services.caching import make_catalogue_key, catalogue_condition, get_catalogue_not_modified
 
 
 class ServicePlansMixin(SingleObjectMixin):
@@ -12,5 +22,117 @@ class ServicePlansMixin(SingleObjectMixin):
     """
 
 
+class AnonymousPageCacheMixin:
+    """
+    Mixin for catalogue views, that caches rendered pages for anonymous visitors.
+    A page is cached per path and the query params, that are returned by 'get_page_cache_params',
+    and is invalidated together with the rest of catalogue data. Anonymous visitors, that already have
+    the current version of the page, get "304 Not Modified". Visitors with a session (authenticated users,
+    or anonymous ones with pending messages) always get a freshly rendered page
+    """
+
+    def get_page_cache_params(self) -> dict:
+        """Returns normalized query params, that change content of the page"""
+        return {}
+
+    def is_page_cacheable(self) -> bool:
+        return self.request.method == 'GET' and settings.SESSION_COOKIE_NAME not in self.request.COOKIES
+
+    def get_page_cache_key(self) -> str:
+        params = urlencode(sorted(self.get_page_cache_params().items()))
+        return make_catalogue_key('page', self.request.path, params)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_page_cacheable():
+            return super().dispatch(request, *args, **kwargs)
+        response = catalogue_condition(self.get_cached_page)(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    def get_cached_page(self, request, *args, **kwargs):
+        key = self.get_page_cache_key()
+        response = self.get_cached_response(key)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            self.cache_page_on_render(response, key)
+        return response
+
+    @staticmethod
+    def get_cached_response(key: str):
+        """Returns a response with the page, cached under passed key, or None, if it isn't cached"""
+        cached_page = cache.get(key)
+        if cached_page is None:
+            return None
+        content, content_type = cached_page
+        return HttpResponse(content, content_type=content_type)
+
+    @staticmethod
+    def cache_page_on_render(response, key: str) -> None:
+        """Makes a successful template response cache its page under passed key, once it's rendered"""
+        if response.status_code == 200 and hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key, (rendered.content, rendered['Content-Type']), timeout=settings.CATALOGUE_CACHE_TIMEOUT
+                )
+            )
+
+
+class AsyncViewMixin:
+    """
+    Mixin for class-based views with async handlers (async def get), which Django 3.2 can't detect by itself,
+    so they're run on the event loop under ASGI instead of taking a thread
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view._is_coroutine = asyncio.coroutines._is_coroutine
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        # sync handlers, like the one of not allowed methods, return a response right away
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+
+class AsyncDetailViewMixin(AsyncViewMixin):
+    """Mixin for DetailView, that gets the object and context data, which query the database, in a thread"""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await database_sync_to_async(self.get_object)()
+        context = await database_sync_to_async(self.get_context_data)(object=self.object)
+        return self.render_to_response(context)
+
+
+class AsyncAnonymousPageCacheMixin(AnonymousPageCacheMixin):
+    """
+    AnonymousPageCacheMixin for views with async handlers. Cache lookups run in a thread, as cache backends are sync,
+    and pages are rendered by Django in the thread of the request
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not self.is_page_cacheable():
+            return await self.dispatch_to_handler(request, *args, **kwargs)
+
+        not_modified, add_validators = await sync_to_async(get_catalogue_not_modified)(request)
+        response = not_modified
+        if response is None:
+            key = await sync_to_async(self.get_page_cache_key)()
+            response = await sync_to_async(self.get_cached_response)(key)
+            if response is None:
+                response = await self.dispatch_to_handler(request, *args, **kwargs)
+                self.cache_page_on_render(response, key)
+
+        add_validators(response)
+        patch_vary_headers(response, ('Cookie',))
+        return response
 
+    async def dispatch_to_handler(self, request, *args, **kwargs):
+        # skips sync dispatch of AnonymousPageCacheMixin, which is replaced by this one
+        response = super(AnonymousPageCacheMixin, self).dispatch(request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
 
@@ -1,7 +1,8 @@
 from django.db import models
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.auth.models import User
 
 
@@ -20,6 +21,13 @@ class Service(models.Model):
 class Plan(models.Model):
     class Meta:
         abstract = True
+        constraints = [
+            models.UniqueConstraint(fields=['service', 'slug'], name='%(class)s_unique_service_slug')
+        ]
+        indexes = [
+            models.Index(fields=['price', 'id'], name='%(class)s_price_id_idx'),
+            models.Index(fields=['name', 'id'], name='%(class)s_name_id_idx'),
+        ]
 
     name = models.CharField(max_length=255)
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
@@ -27,6 +35,18 @@ class Plan(models.Model):
     price = models.DecimalField(max_digits=9, decimal_places=2)
     days_to_connect = models.IntegerField()
     description = models.TextField()
+    ordered_plans = GenericRelation('OrderedPlan')
+
+    # name of the field, that is shown as a main characteristic of the plan in listings
+    HEADLINE_FIELD = None
+    # names of categorical fields, that plans of the service can be narrowed down by in search and listings
+    FACET_FIELDS = ()
+    # names of numeric fields, that plans of the service can be narrowed down to a range of values of in listings
+    RANGE_FIELDS = ('price',)
+
+    def get_headline_metric(self):
+        """Returns value of the main characteristic of the plan"""
+        return getattr(self, self.HEADLINE_FIELD)
 
     def get_absolute_url(self):
         """Returns url for a details view of the plan"""
@@ -41,12 +61,30 @@ class Plan(models.Model):
 
 
 class InternetPlan(Plan):
+    HEADLINE_FIELD = 'speed'
+    RANGE_FIELDS = ('price', 'speed')
+
+    class Meta(Plan.Meta):
+        indexes = Plan.Meta.indexes + [
+            models.Index(fields=['speed', 'id'], name='internetplan_speed_id_idx'),
+        ]
 
     connection_type = models.CharField(max_length=255)
     speed = models.IntegerField()
 
 
 class WirelessPlan(Plan):
+    HEADLINE_FIELD = 'data_amount'
+    FACET_FIELDS = ('internet_type',)
+    RANGE_FIELDS = ('price', 'data_amount')
+
+    class Meta(Plan.Meta):
+        indexes = Plan.Meta.indexes + [
+            models.Index(fields=['data_amount', 'id'], name='wirelessplan_data_id_idx'),
+            models.Index(fields=['internet_type', 'price', 'id'], name='wirelessplan_type_price_idx'),
+            models.Index(fields=['internet_type', 'data_amount', 'id'], name='wirelessplan_type_data_idx'),
+        ]
+
     I3G = "3G"
     I4G = "4G"
     I5G = "5G"
@@ -65,18 +103,69 @@ class WirelessPlan(Plan):
 
 
 class TVPlan(Plan):
+    HEADLINE_FIELD = 'channels_amount'
+    FACET_FIELDS = ('quality',)
+    RANGE_FIELDS = ('price', 'channels_amount')
+
+    class Meta(Plan.Meta):
+        indexes = Plan.Meta.indexes + [
+            models.Index(fields=['channels_amount', 'id'], name='tvplan_channels_id_idx'),
+            models.Index(fields=['quality', 'price', 'id'], name='tvplan_quality_price_idx'),
+            models.Index(fields=['quality', 'channels_amount', 'id'], name='tvplan_quality_channels_idx'),
+        ]
 
     quality = models.CharField(max_length=20)
     channels_amount = models.IntegerField()
     parent_control_available = models.BooleanField()
 
 
+class PlanIndex(models.Model):
+    """
+    A denormalized catalogue entry of a plan of any service.
+    Kept in sync with concrete plan tables by signals, so cross-service queries hit a single table.
+    On PostgreSQL the table also has a generated "search_vector" column with a GIN index for full-text search
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='planindex_unique_plan')
+        ]
+        indexes = [
+            models.Index(fields=['service', 'slug'], name='planindex_service_slug_idx'),
+            models.Index(fields=['service', 'price'], name='planindex_service_price_idx'),
+            models.Index(fields=['price', 'id'], name='planindex_price_id_idx'),
+            models.Index(fields=['name', 'id'], name='planindex_name_id_idx'),
+        ]
+
+    service = models.ForeignKey(Service, on_delete=models.CASCADE)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    slug = models.SlugField(db_index=False)
+    name = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=9, decimal_places=2)
+    headline_metric = models.IntegerField()
+    days_to_connect = models.IntegerField(default=0)
+    description = models.TextField(blank=True)
+    service_name = models.CharField(max_length=255, blank=True)
+    # facet fields of plans of some services, empty for plans of other services
+    internet_type = models.CharField(max_length=2, null=True, blank=True)
+    quality = models.CharField(max_length=20, null=True, blank=True)
+
+    def get_absolute_url(self):
+        """Returns url for a details view of the plan"""
+        return get_url_with_service_slug_plan_slug('plan_details', self.service.slug, self.slug)
+
+    def __str__(self):
+        return self.name
+
+
 class OrderedPlansList(models.Model):
     """A "cart" for customer's ordered plans"""
 
-    plans = models.ManyToManyField('OrderedPlan', blank=True, related_name='related_plans')
     owner = models.ForeignKey('Customer', on_delete=models.CASCADE)
-    final_price = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    # total price of ordered plans, kept up to date on order and cancel
+    final_price = models.DecimalField(max_digits=9, decimal_places=2, default=0)
 
     def __str__(self):
         return f"List of {self.owner.user.first_name}"
@@ -85,6 +174,17 @@ class OrderedPlansList(models.Model):
 class OrderedPlan(models.Model):
     """A plan, that a customer has ordered."""
 
+    class Meta:
+        constraints = [
+            # every plan model belongs to one service, so a customer has at most one ordered plan of a service
+            models.UniqueConstraint(fields=['owner', 'content_type'], name='orderedplan_unique_owner_service')
+        ]
+        indexes = [
+            models.Index(fields=['related_list', 'content_type'], name='orderedplan_list_type_idx'),
+            # plans are joined with their orders through the generic relation, e.g. to rank the most popular ones
+            models.Index(fields=['content_type', 'object_id'], name='orderedplan_type_object_idx'),
+        ]
+
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
@@ -106,7 +206,21 @@ class OrderedPlan(models.Model):
 class Customer(models.Model):
     """A unit, that can operate with main part of site logic"""
 
+    ACTIVE = 'active'
+    BLOCKED = 'blocked'
+    STATUS_CHOICES = [
+        (ACTIVE, 'Active'),
+        (BLOCKED, 'Blocked')
+    ]
+
+    class Meta:
+        indexes = [
+            # only blocked customers are indexed, it keeps the index tiny for the status check on every order
+            models.Index(fields=['user'], condition=models.Q(status='blocked'), name='customer_blocked_user_idx')
+        ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    status = models.CharField(choices=STATUS_CHOICES, max_length=10, default=ACTIVE)
     phone = models.CharField(max_length=20, null=True, blank=True)
     city = models.CharField(max_length=50, null=True, blank=True)
     street = models.CharField(max_length=100, null=True, blank=True)
@@ -114,4 +228,102 @@ class Customer(models.Model):
     apartment_num = models.IntegerField(null=True, blank=True)
 
     def __str__(self):
-        return f"{self.user.first_name} {self.user.last_name}"
\ No newline at end of file
+        return f"{self.user.first_name} {self.user.last_name}"
+
+
+class Account(models.Model):
+    """Customer's account, that is replenished by the customer and charged for confirmed ordered plans"""
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(status_dirty=True), name='account_status_dirty_idx')
+        ]
+
+    customer = models.OneToOneField('Customer', related_name='account', on_delete=models.CASCADE)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # set when the balance is changed, until customer's status is re-evaluated
+    status_dirty = models.BooleanField(default=False)
+
+    def save(self, *args, **kwargs):
+        self.status_dirty = True
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'Account of {self.customer}: {self.balance}'
+
+
+class BillingRun(models.Model):
+    """Progress of billing all customers for a period, lets an interrupted billing cycle be resumed"""
+
+    period = models.CharField(max_length=7, unique=True)
+    last_customer_id = models.BigIntegerField(default=0)
+    billed_customers = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Billing for {self.period}'
+
+
+class LedgerEntry(models.Model):
+    """A change of an account balance: a charge for a billing period, or a top up"""
+
+    CHARGE = 'charge'
+    TOP_UP = 'top_up'
+    KIND_CHOICES = [
+        (CHARGE, 'Charge'),
+        (TOP_UP, 'Top up')
+    ]
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account', 'period'], condition=models.Q(kind='charge'), name='ledgerentry_unique_charge'
+            )
+        ]
+
+    account = models.ForeignKey(Account, related_name='entries', on_delete=models.CASCADE)
+    kind = models.CharField(choices=KIND_CHOICES, max_length=10)
+    # negative for charges
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    period = models.CharField(max_length=7, blank=True)
+    billing_run = models.ForeignKey(BillingRun, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.amount} of {self.account_id} account'
+
+
+class QueuedMail(models.Model):
+    """An outgoing mail, stored in the outbox until a mail worker delivers it"""
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead')
+    ]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='queuedmail_status_attempt_idx')
+        ]
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=254, null=True, blank=True)
+    recipients = models.JSONField()
+    status = models.CharField(choices=STATUS_CHOICES, max_length=10, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # when a mail worker took the mail for delivery
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.subject} to {", ".join(self.recipients)} ({self.status})'
@@ -0,0 +1,34 @@
+import asyncio
+from functools import wraps
+from weakref import WeakKeyDictionary
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+# semaphores, that limit database calls of async views, per event loop, as a semaphore can't be shared by loops
+_database_semaphores = WeakKeyDictionary()
+
+
+def get_database_semaphore() -> asyncio.Semaphore:
+    """Returns the semaphore of the running event loop, that limits amount of concurrent database calls"""
+    loop = asyncio.get_running_loop()
+    if loop not in _database_semaphores:
+        _database_semaphores[loop] = asyncio.Semaphore(settings.ASYNC_DB_CONCURRENCY)
+    return _database_semaphores[loop]
+
+
+def database_sync_to_async(func):
+    """
+    Makes an awaitable of a sync function, that queries the database. The function runs in the thread of the request,
+    like Django runs sync views and ORM calls under ASGI, so it shares the request's connection and transaction.
+    At most ASYNC_DB_CONCURRENCY calls of a worker process run at once, the rest wait without taking a thread,
+    so a burst of requests can't take more database connections than that
+    """
+    func_async = sync_to_async(func, thread_sensitive=True)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with get_database_semaphore():
+            return await func_async(*args, **kwargs)
+
+    return wrapper
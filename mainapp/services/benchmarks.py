@@ -0,0 +1,170 @@
+import random
+import time
+import tracemalloc
+from collections import namedtuple
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from mainapp.models import InternetPlan, Customer, Account
+from .datagen import generate_data, generate_customers, refresh_denormalized_data, DEFAULT_SEED, GENERATED_PASSWORD
+
+# (max queries, max p95 latency in ms) of every benchmarked request, None stands for a budget that isn't enforced
+VIEW_BUDGETS = {
+    'home': (3, 100),
+    'service_details': (4, 150),
+    'service_details:filtered': (4, 150),
+    'plan_details': (5, 100),
+    'order_submission:get': (4, 100),
+    'order_submission:post': (10, 200),
+    'ordered_plan_cancel': (6, 100),
+    'account': (7, 150),
+    'api:services': (3, 100),
+    'api:internet': (3, 150),
+    'api:wireless': (3, 150),
+    'api:tv': (3, 150),
+    'api:plans': (3, 150),
+}
+
+# statements of transaction management, they depend on the database and on nesting of atomic blocks
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+BenchmarkData = namedtuple('BenchmarkData', ['user', 'order_plan', 'detail_plan'])
+
+
+@dataclass
+class ViewBenchmark:
+    """Measurements of one benchmarked request, repeated several times"""
+
+    name: str
+    queries: int = 0
+    timings: list = field(default_factory=list)
+    peak_memory: int = 0
+
+    def percentile(self, percent: int) -> float:
+        """Returns the nearest-rank percentile of request timings in ms"""
+        timings = sorted(self.timings)
+        return timings[max(0, -(-len(timings) * percent // 100) - 1)] if timings else 0.0
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> float:
+        return self.percentile(95)
+
+    def get_violations(self, check_latency: bool = True) -> list:
+        """Returns descriptions of exceeded budgets of the request"""
+        max_queries, max_p95 = VIEW_BUDGETS[self.name]
+        violations = []
+        if max_queries is not None and self.queries > max_queries:
+            violations.append(f'{self.name}: {self.queries} queries, budget is {max_queries}')
+        if check_latency and max_p95 is not None and self.p95 > max_p95:
+            violations.append(f'{self.name}: p95 {self.p95:.1f}ms, budget is {max_p95}ms')
+        return violations
+
+
+def count_queries(captured_queries) -> int:
+    """Returns amount of captured queries, which aren't transaction management statements"""
+    return sum(1 for query in captured_queries if not query['sql'].upper().startswith(TRANSACTION_STATEMENTS))
+
+
+def seed_benchmark_data(plans_per_service: int, customers: int, max_cart_size: int,
+                        seed: int = DEFAULT_SEED, batch_size: int = 1000) -> BenchmarkData:
+    """
+    Generates plans and customers for benchmarks. Returns a user to benchmark views with, whose cart is full
+    and has no internet plan, so an internet plan can be ordered and cancelled
+    """
+    plans = generate_data(plans_per_service, customers, max_cart_size, seed, 'bench', batch_size, refresh=False)
+
+    user = User.objects.create(username='bench-user', password=make_password(GENERATED_PASSWORD))
+    generate_customers(
+        [user.username], [max_cart_size], plans['wireless'] + plans['tv'], user.password, random.Random(seed),
+        users=[user]
+    )
+    # the user must be able to order
+    Account.objects.filter(customer__user=user).update(balance=1000)
+    Customer.objects.filter(user=user).update(status=Customer.ACTIVE)
+    refresh_denormalized_data(batch_size)
+
+    return BenchmarkData(
+        user=user,
+        order_plan=InternetPlan.objects.get(pk=plans['internet'][0][1]),
+        detail_plan=InternetPlan.objects.get(pk=plans['internet'][-1][1])
+    )
+
+
+def get_benchmark_requests(data: BenchmarkData) -> list:
+    """
+    Returns (name, method, url, data) of benchmarked requests in the order they're made in a round,
+    the plan, which is ordered in a round, is cancelled in the same round
+    """
+    order_plan, detail_plan = data.order_plan, data.detail_plan
+    order_data = {
+        'first_name': 'Bench',
+        'last_name': 'Mark',
+        'email': 'bench@example.com',
+        'phone': '+380991111111',
+        'city': 'Kyiv',
+        'street': 'Main',
+        'house_num': 1,
+        'apartment_num': 1
+    }
+    return [
+        ('home', 'get', reverse('home'), None),
+        ('service_details', 'get', reverse('service_details', kwargs={'slug': 'internet'}), None),
+        ('service_details:filtered', 'get', reverse('service_details', kwargs={'slug': 'wireless'}),
+         {'filter': 'price', 'internet_type': '5G', 'min_data_amount': 10}),
+        ('plan_details', 'get', detail_plan.get_absolute_url(), None),
+        ('order_submission:get', 'get', order_plan.get_order_page(), None),
+        ('order_submission:post', 'post', order_plan.get_order_page(), order_data),
+        ('ordered_plan_cancel', 'get', reverse(
+            'cancel_plan', kwargs={'s_slug': order_plan.service.slug, 'p_slug': order_plan.slug}
+        ), None),
+        ('account', 'get', reverse('account'), None),
+        ('api:services', 'get', '/api/services/', None),
+        ('api:internet', 'get', '/api/internet/', None),
+        ('api:wireless', 'get', '/api/wireless/', None),
+        ('api:tv', 'get', '/api/tv/', None),
+        ('api:plans', 'get', '/api/plans/', {'service': 'internet,tv', 'max_price': 1000, 'ordering': '-price'}),
+    ]
+
+
+def run_view_benchmarks(data: BenchmarkData, repeat: int = 20) -> list:
+    """
+    Makes every benchmarked request as the benchmark user repeat times after a warm up round,
+    and returns a ViewBenchmark of each. Memory is traced in a separate round, so it doesn't affect timings
+    """
+    client = Client()
+    client.force_login(data.user)
+    requests = get_benchmark_requests(data)
+    results = {name: ViewBenchmark(name) for name, *_ in requests}
+
+    def make_round(trace_memory: bool = False, measure: bool = True) -> None:
+        for name, method, url, request_data in requests:
+            if trace_memory:
+                tracemalloc.start()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data=request_data)
+                elapsed = (time.perf_counter() - started) * 1000
+            if trace_memory:
+                results[name].peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name} request to {url} failed with {response.status_code}')
+            if measure and not trace_memory:
+                results[name].queries = max(results[name].queries, count_queries(queries))
+                results[name].timings.append(elapsed)
+
+    make_round(measure=False)
+    for _ in range(repeat):
+        make_round()
+    make_round(trace_memory=True)
+    return list(results.values())
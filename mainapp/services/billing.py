@@ -0,0 +1,166 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum, Subquery, OuterRef
+from django.utils import timezone
+
+from mainapp.models import Customer, Account, LedgerEntry, BillingRun
+from .db_operations import SERVICE_SLUG2PLAN_MODEL
+
+
+def get_billing_period(day: date = None) -> str:
+    """Returns billing period ('YYYY-MM') of passed day, today by default"""
+    day = day or timezone.now().date()
+    return day.strftime('%Y-%m')
+
+
+def get_customer_charges(customer_ids: list) -> dict:
+    """Returns monthly charges of passed customers for their confirmed ordered plans, with one query per plan model"""
+    charges = defaultdict(Decimal)
+    for model in SERVICE_SLUG2PLAN_MODEL.values():
+        totals = (
+            model.objects.filter(ordered_plans__owner_id__in=customer_ids, ordered_plans__confirmed=True)
+            .values_list('ordered_plans__owner_id')
+            .annotate(total=Sum('price'))
+        )
+        for customer_id, total in totals:
+            charges[customer_id] += total
+    return charges
+
+
+def bill_customers_chunk(billing_run: BillingRun, customer_ids: list) -> int:
+    """
+    Charges passed customers for the billing run's period with set-based queries:
+    accounts and ledger entries are created in bulk, balances and statuses are changed by single UPDATEs.
+    Statuses of charged customers are re-evaluated right away. Returns amount of charged customers
+    """
+    charges = {customer_id: charge for customer_id, charge in get_customer_charges(customer_ids).items() if charge}
+    if not charges:
+        return 0
+
+    Account.objects.bulk_create([Account(customer_id=customer_id) for customer_id in charges], ignore_conflicts=True)
+    account_ids = dict(Account.objects.filter(customer_id__in=charges).values_list('customer_id', 'id'))
+
+    # customers, that were already charged for the period (e.g. by a retried chunk), are neither charged again,
+    # nor have their balance changed, the billing run is locked by the caller, so no charge appears meanwhile
+    charged_account_ids = set(
+        LedgerEntry.objects.filter(account_id__in=account_ids.values(), kind=LedgerEntry.CHARGE,
+                                   period=billing_run.period)
+        .values_list('account_id', flat=True)
+    )
+    new_charges = {
+        account_ids[customer_id]: charge for customer_id, charge in charges.items()
+        if account_ids[customer_id] not in charged_account_ids
+    }
+    if not new_charges:
+        return 0
+
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(
+            account_id=account_id,
+            kind=LedgerEntry.CHARGE,
+            amount=-charge,
+            period=billing_run.period,
+            billing_run=billing_run
+        )
+        for account_id, charge in new_charges.items()
+    ])
+    period_charges = LedgerEntry.objects.filter(
+        account=OuterRef('pk'), kind=LedgerEntry.CHARGE, period=billing_run.period
+    )
+    charged = Account.objects.filter(id__in=new_charges).update(
+        balance=F('balance') + Subquery(period_charges.values('amount')[:1])
+    )
+
+    apply_customer_statuses(list(charges))
+    return charged
+
+
+def run_billing_cycle(period: str = None, chunk_size: int = None) -> BillingRun:
+    """
+    Charges all customers for their confirmed ordered plans for the period, walking customers by id in chunks.
+    Every chunk is billed in its own transaction together with the checkpoint of the billing run,
+    so an interrupted cycle continues from the last billed chunk, and a finished one isn't run twice.
+    The billing run is locked and re-read in every chunk, so overlapping cycles of a period bill each chunk once
+    """
+    period = period or get_billing_period()
+    chunk_size = chunk_size or settings.BILLING_CHUNK_SIZE
+    billing_run, _ = BillingRun.objects.get_or_create(period=period)
+
+    while billing_run.finished_at is None:
+        with transaction.atomic():
+            billing_run = BillingRun.objects.select_for_update().get(pk=billing_run.pk)
+            if billing_run.finished_at is not None:
+                break
+            customer_ids = list(
+                Customer.objects.filter(id__gt=billing_run.last_customer_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if customer_ids:
+                billing_run.billed_customers += bill_customers_chunk(billing_run, customer_ids)
+                billing_run.last_customer_id = customer_ids[-1]
+            else:
+                billing_run.finished_at = timezone.now()
+            billing_run.save(update_fields=['billed_customers', 'last_customer_id', 'finished_at'])
+
+    return billing_run
+
+
+def top_up_account(customer: Customer, amount: Decimal) -> LedgerEntry:
+    """Adds passed amount to customer's account balance, a blocked customer is unblocked if the debt is paid"""
+    with transaction.atomic():
+        account, _ = Account.objects.get_or_create(customer=customer)
+        entry = LedgerEntry.objects.create(account=account, kind=LedgerEntry.TOP_UP, amount=amount)
+        Account.objects.filter(pk=account.pk).update(balance=F('balance') + amount)
+        apply_customer_statuses([customer.pk])
+    return entry
+
+
+def apply_customer_statuses(customer_ids: list) -> dict:
+    """
+    Blocks passed customers, that owe money, and unblocks ones, whose balance isn't negative anymore,
+    with two UPDATEs. Returns amounts of blocked and unblocked customers
+    """
+    blocked = (
+        Customer.objects.filter(id__in=customer_ids, account__balance__lt=0)
+        .exclude(status=Customer.BLOCKED)
+        .update(status=Customer.BLOCKED)
+    )
+    unblocked = (
+        Customer.objects.filter(id__in=customer_ids, account__balance__gte=0, status=Customer.BLOCKED)
+        .update(status=Customer.ACTIVE)
+    )
+    Account.objects.filter(customer_id__in=customer_ids, status_dirty=True).update(status_dirty=False)
+    return {'blocked': blocked, 'unblocked': unblocked}
+
+
+def refresh_customer_statuses(batch_size: int = None) -> dict:
+    """
+    Re-evaluates statuses of customers, whose balance was changed since the last run, in batches.
+    Changed accounts are found by the partial index on the dirty flag, so untouched customers are never scanned,
+    and they're locked while their statuses are applied, so a concurrent balance change isn't lost
+    """
+    batch_size = batch_size or settings.BILLING_CHUNK_SIZE
+    stats = {'blocked': 0, 'unblocked': 0}
+
+    while True:
+        with transaction.atomic():
+            customer_ids = list(
+                Account.objects.select_for_update(skip_locked=True)
+                .filter(status_dirty=True)
+                .order_by('id')
+                .values_list('customer_id', flat=True)[:batch_size]
+            )
+            if not customer_ids:
+                return stats
+            for key, amount in apply_customer_statuses(customer_ids).items():
+                stats[key] += amount
+
+
+def is_blocked(user) -> bool:
+    """Returns True if user's customer is blocked, it's a lookup in the partial index of blocked customers"""
+    return Customer.objects.filter(user=user, status=Customer.BLOCKED).exists()
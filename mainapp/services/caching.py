@@ -0,0 +1,99 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+CATALOGUE_MODIFIED_KEY = 'catalogue:modified'
+
+
+def get_catalogue_version() -> int:
+    """Returns current version of the catalogue, which changes every time any plan or service is changed"""
+    return cache.get_or_set(CATALOGUE_VERSION_KEY, 1, timeout=None)
+
+
+def get_catalogue_state() -> tuple:
+    """Returns current version of the catalogue and a timestamp of its last change with a single cache lookup"""
+    state = cache.get_many([CATALOGUE_VERSION_KEY, CATALOGUE_MODIFIED_KEY])
+    if len(state) < 2:
+        # the cache was flushed, so all cached catalogue data is gone, and it's as good as a change
+        state = {CATALOGUE_VERSION_KEY: get_catalogue_version(), CATALOGUE_MODIFIED_KEY: time.time()}
+        cache.set(CATALOGUE_MODIFIED_KEY, state[CATALOGUE_MODIFIED_KEY], timeout=None)
+    return state[CATALOGUE_VERSION_KEY], state[CATALOGUE_MODIFIED_KEY]
+
+
+def _increment_catalogue_version() -> None:
+    try:
+        cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOGUE_VERSION_KEY, 1, timeout=None)
+    cache.set(CATALOGUE_MODIFIED_KEY, time.time(), timeout=None)
+
+
+def bump_catalogue_version() -> None:
+    """
+    Invalidates all cached catalogue data by changing the catalogue version.
+    The version is changed once more after the transaction commits,
+    so data cached by concurrent requests before the commit isn't served afterwards
+    """
+    _increment_catalogue_version()
+    transaction.on_commit(_increment_catalogue_version)
+
+
+def make_catalogue_key(*parts) -> str:
+    """Returns a cache key, that is valid only for the current version of the catalogue"""
+    return ':'.join(['catalogue', str(get_catalogue_version()), *map(str, parts)])
+
+
+def get_or_set_catalogue_data(key_parts: tuple, default, timeout: int = None):
+    """
+    Returns cached catalogue data stored under 'key_parts',
+    if there's no data, it's computed by 'default' callable and cached for 'timeout' seconds
+    """
+    if timeout is None:
+        timeout = settings.CATALOGUE_CACHE_TIMEOUT
+    return cache.get_or_set(make_catalogue_key(*key_parts), default, timeout=timeout)
+
+
+def get_catalogue_etag(request, *args, **kwargs) -> str:
+    """
+    Returns ETag of a catalogue response, which changes with the catalogue.
+    Accept header is a part of it, as the same url is rendered differently for browsers and API clients
+    """
+    version, modified = get_catalogue_state()
+    accept = request.META.get('HTTP_ACCEPT', '')
+    return 'W/"%s"' % hashlib.md5(f'{version}:{modified}:{accept}'.encode()).hexdigest()
+
+
+def get_catalogue_last_modified(request, *args, **kwargs) -> datetime:
+    """Returns time of the last change of the catalogue"""
+    return datetime.fromtimestamp(get_catalogue_state()[1], tz=timezone.utc)
+
+
+# answers GET requests of catalogue data with "304 Not Modified", if the client has the current version
+catalogue_condition = condition(etag_func=get_catalogue_etag, last_modified_func=get_catalogue_last_modified)
+
+
+def get_catalogue_not_modified(request) -> tuple:
+    """
+    Does the same check as 'catalogue_condition' for views, that can't be decorated by it (e.g. async ones).
+    Returns "304 Not Modified" response or None, if the client doesn't have the current version of the catalogue,
+    and a function, that adds the catalogue validators to the final response
+    """
+    etag = quote_etag(get_catalogue_etag(request))
+    last_modified = int(get_catalogue_state()[1])
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def add_validators(response) -> None:
+        if request.method in ('GET', 'HEAD'):
+            if not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(last_modified)
+            response.headers.setdefault('ETag', etag)
+
+    return not_modified, add_validators
@@ -0,0 +1,79 @@
+from django.contrib.contenttypes.models import ContentType
+
+from mainapp.models import PlanIndex
+from .caching import bump_catalogue_version
+from .db_operations import SERVICE_SLUG2PLAN_MODEL
+
+
+# fields of a catalogue entry, that are copied from its plan
+PLAN_INDEX_SYNCED_FIELDS = (
+    'service_id', 'slug', 'name', 'price', 'headline_metric', 'days_to_connect', 'description', 'service_name',
+    'internet_type', 'quality'
+)
+
+
+def get_plan_models() -> list:
+    """Returns concrete plan models of all services"""
+    return list(SERVICE_SLUG2PLAN_MODEL.values())
+
+
+def build_plan_index_entry(plan, content_type: ContentType = None) -> PlanIndex:
+    """Returns an unsaved catalogue entry, filled with passed plan's data"""
+    return PlanIndex(
+        service_id=plan.service_id,
+        content_type=content_type or ContentType.objects.get_for_model(plan),
+        object_id=plan.id,
+        slug=plan.slug,
+        name=plan.name,
+        price=plan.price,
+        headline_metric=plan.get_headline_metric(),
+        days_to_connect=plan.days_to_connect,
+        description=plan.description,
+        service_name=plan.service.name,
+        **{field: getattr(plan, field) for field in plan.FACET_FIELDS}
+    )
+
+
+def sync_plan_index(plan) -> None:
+    """Creates or updates catalogue entry of passed plan"""
+    entry = build_plan_index_entry(plan)
+    PlanIndex.objects.update_or_create(
+        content_type=entry.content_type,
+        object_id=entry.object_id,
+        defaults={field: getattr(entry, field) for field in PLAN_INDEX_SYNCED_FIELDS}
+    )
+
+
+def remove_plan_index(plan) -> None:
+    """Deletes catalogue entry of passed plan"""
+    PlanIndex.objects.filter(content_type=ContentType.objects.get_for_model(plan), object_id=plan.id).delete()
+
+
+def sync_service_name(service) -> None:
+    """Updates the service name in catalogue entries of the service's plans"""
+    PlanIndex.objects.filter(service=service).exclude(service_name=service.name).update(service_name=service.name)
+
+
+def rebuild_plan_index(batch_size: int = 1000) -> int:
+    """
+    Recreates the whole catalogue from concrete plan tables, returns amount of created entries.
+    Cached catalogue data is invalidated, as entries are created without signals
+    """
+    PlanIndex.objects.all().delete()
+
+    created = 0
+    for model in get_plan_models():
+        content_type = ContentType.objects.get_for_model(model)
+        entries = []
+        for plan in model.objects.select_related('service').iterator(chunk_size=batch_size):
+            entries.append(build_plan_index_entry(plan, content_type))
+            if len(entries) == batch_size:
+                PlanIndex.objects.bulk_create(entries)
+                created += len(entries)
+                entries = []
+        PlanIndex.objects.bulk_create(entries)
+        created += len(entries)
+
+    bump_catalogue_version()
+    return created
+
@@ -0,0 +1,189 @@
+import io
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+
+from mainapp.models import Service, InternetPlan, WirelessPlan, TVPlan, Customer, OrderedPlansList, OrderedPlan, Account
+from .caching import bump_catalogue_version
+from .catalogue import rebuild_plan_index
+from .db_operations import recalculate_cart_totals
+
+DEFAULT_SEED = 42
+
+GENERATED_SERVICES = (
+    ('internet', 'Internet', InternetPlan),
+    ('wireless', 'Wireless', WirelessPlan),
+    ('tv', 'Television', TVPlan),
+)
+
+GENERATED_PASSWORD = 'generated321'
+
+
+def format_copy_value(value) -> str:
+    """Returns passed value in the text format of PostgreSQL COPY"""
+    if value is None:
+        return '\\N'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copy_objects(model, objects: list) -> None:
+    """Inserts passed unsaved objects with a single COPY, it's much faster than INSERT for big batches"""
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    buffer = io.StringIO()
+    for obj in objects:
+        buffer.write('\t'.join(
+            format_copy_value(field.get_db_prep_save(getattr(obj, field.attname), connection)) for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN', buffer
+        )
+
+
+def load_objects(model, objects: list, batch_size: int = 1000) -> None:
+    """
+    Inserts passed unsaved objects without signals, by COPY on PostgreSQL and by batched bulk_create elsewhere.
+    Primary keys aren't set on the objects, saved rows should be looked up by their natural keys
+    """
+    if not objects:
+        return
+    if connection.vendor == 'postgresql':
+        copy_objects(model, objects)
+    else:
+        model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def build_plans(model, service: Service, numbers: range, rng: random.Random, prefix: str) -> list:
+    """Returns unsaved plans of passed model with passed numbers and random characteristics"""
+    plans = []
+    for i in numbers:
+        plan = model(
+            name=f'{service.name} {prefix} {i}',
+            service=service,
+            slug=f'{prefix}-{i}',
+            price=rng.randint(50, 2000),
+            days_to_connect=rng.randint(1, 14),
+            description=f'Generated plan {i} of {service.name}'
+        )
+        if model is InternetPlan:
+            plan.connection_type = rng.choice(['Fiber', 'DSL', 'Cable'])
+            plan.speed = rng.randint(10, 1000)
+        elif model is WirelessPlan:
+            plan.data_amount = rng.randint(1, 100)
+            plan.internet_type = rng.choice([WirelessPlan.I3G, WirelessPlan.I4G, WirelessPlan.I5G])
+            plan.minutes_out = rng.randint(0, 3000)
+            plan.minutes_abroad = rng.randint(0, 300)
+            plan.sms_amount = rng.randint(0, 1000)
+            plan.connect_with_passport = rng.random() < 0.5
+        else:
+            plan.quality = rng.choice(['HD', 'FullHD', '4K'])
+            plan.channels_amount = rng.randint(20, 500)
+            plan.parent_control_available = rng.random() < 0.5
+        plans.append(plan)
+    return plans
+
+
+def generate_plans(plans_per_service: int, rng: random.Random, prefix: str, batch_size: int = 1000) -> dict:
+    """
+    Creates plans of every service, and services themselves if needed.
+    Returns a dict of service slug and (content type id, plan id) pairs of created plans
+    """
+    plans = {}
+    for slug, name, model in GENERATED_SERVICES:
+        service, _ = Service.objects.get_or_create(slug=slug, defaults={'name': name})
+        for start in range(0, plans_per_service, batch_size):
+            with transaction.atomic():
+                numbers = range(start, min(start + batch_size, plans_per_service))
+                load_objects(model, build_plans(model, service, numbers, rng, prefix), batch_size)
+        content_type = ContentType.objects.get_for_model(model)
+        plans[slug] = [
+            (content_type.id, plan_id)
+            for plan_id in model.objects.filter(service=service, slug__startswith=f'{prefix}-')
+            .order_by('id').values_list('id', flat=True)
+        ]
+    return plans
+
+
+def generate_customers(usernames: list, cart_sizes: list, plans: list, password: str, rng: random.Random,
+                       users: list = None) -> None:
+    """
+    Creates customers with passed usernames, their accounts and carts, filled with random plans of passed plans.
+    A cart gets at most one plan of every service, so its size is capped by the amount of services.
+    Users are created too, unless they're passed
+    """
+    plans_by_content_type = {}
+    for content_type_id, plan_id in plans:
+        plans_by_content_type.setdefault(content_type_id, []).append(plan_id)
+    content_type_ids = sorted(plans_by_content_type)
+
+    with transaction.atomic():
+        if users is None:
+            load_objects(User, [User(username=username, password=password) for username in usernames])
+            users = User.objects.filter(username__in=usernames).order_by('id')
+
+        user_ids = [user.id for user in users]
+        balances = {user_id: rng.randint(-100, 1000) for user_id in user_ids}
+        load_objects(Customer, [
+            Customer(user_id=user_id, status=Customer.BLOCKED if balances[user_id] < 0 else Customer.ACTIVE)
+            for user_id in user_ids
+        ])
+        customer_ids = dict(Customer.objects.filter(user_id__in=user_ids).values_list('user_id', 'id'))
+        load_objects(OrderedPlansList, [OrderedPlansList(owner_id=customer_ids[user_id]) for user_id in user_ids])
+        cart_ids = dict(
+            OrderedPlansList.objects.filter(owner_id__in=customer_ids.values()).values_list('owner_id', 'id')
+        )
+        load_objects(Account, [
+            Account(customer_id=customer_id, balance=balances[user_id]) for user_id, customer_id in customer_ids.items()
+        ])
+
+        ordered_plans = []
+        for user_id, cart_size in zip(user_ids, cart_sizes):
+            customer_id = customer_ids[user_id]
+            for content_type_id in rng.sample(content_type_ids, min(cart_size, len(content_type_ids))):
+                ordered_plans.append(OrderedPlan(
+                    content_type_id=content_type_id,
+                    object_id=rng.choice(plans_by_content_type[content_type_id]),
+                    owner_id=customer_id,
+                    related_list_id=cart_ids[customer_id],
+                    confirmed=rng.random() < 0.8
+                ))
+        load_objects(OrderedPlan, ordered_plans)
+
+
+def generate_data(plans_per_service: int, customers: int, max_cart_size: int, seed: int = DEFAULT_SEED,
+                  prefix: str = 'gen', batch_size: int = 1000, refresh: bool = True) -> dict:
+    """
+    Populates the database with plans of every service and customers with carts of 0 to max_cart_size plans,
+    but no more than one plan of a service, in batches, the same seed gives the same data. Cart totals and the catalogue index are rebuilt afterwards,
+    as bulk loading skips signals, unless 'refresh' is False. Cached catalogue data is invalidated anyway.
+    Returns generated plans like generate_plans does
+    """
+    rng = random.Random(seed)
+    plans = generate_plans(plans_per_service, rng, prefix, batch_size)
+    bump_catalogue_version()
+    all_plans = [plan for service_plans in plans.values() for plan in service_plans]
+
+    password = make_password(GENERATED_PASSWORD)
+    for start in range(0, customers, batch_size):
+        usernames = [f'{prefix}{i}' for i in range(start, min(start + batch_size, customers))]
+        cart_sizes = [rng.randint(0, max_cart_size) for _ in usernames]
+        generate_customers(usernames, cart_sizes, all_plans, password, rng)
+
+    if refresh:
+        refresh_denormalized_data(batch_size)
+    return plans
+
+
+def refresh_denormalized_data(batch_size: int = 1000) -> None:
+    """Recomputes cart totals and the catalogue index, which are kept up to date by signals and services otherwise"""
+    recalculate_cart_totals()
+    rebuild_plan_index(batch_size)
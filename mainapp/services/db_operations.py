@@ -1,8 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.exceptions import FieldError
+from django.http import Http404
+from django.core.cache import cache
+from django.db import transaction, IntegrityError
+from django.db.models import Count, Q, F, Sum, Value, Subquery, OuterRef, DecimalField
+from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.models import ContentType
 
-from mainapp.models import TVPlan, WirelessPlan, InternetPlan, Service, Customer, OrderedPlan, OrderedPlansList
+from mainapp.models import TVPlan, WirelessPlan, InternetPlan, Customer, OrderedPlan, OrderedPlansList
+from .caching import get_or_set_catalogue_data, make_catalogue_key
 
 SERVICE_SLUG2PLAN_MODEL = {
     'tv': TVPlan,
@@ -17,19 +23,37 @@ CT_MODEL__CLASS = {
 }
 
 
-def get_ordered_plan_list_by_user(user: User) -> OrderedPlansList:
-    """Returns ordered plan user for a particular user"""
-    customer = Customer.objects.get(user=user)
-    plan_list = OrderedPlansList.objects.get(owner=customer)
-    return plan_list
+BEST_PLANS_MODELS = (TVPlan, WirelessPlan, InternetPlan)
 
 
-def get_best_plans() -> list:
-    """Returns a list of 3 Plan objects"""
-    best_plans = [TVPlan.objects.first(), WirelessPlan.objects.first(), InternetPlan.objects.first()]
+def rank_best_plans() -> list:
+    """
+    Returns a list of 3 Plan objects (tv, wireless, internet), the most ordered plan of each service,
+    cheaper plans go first among equally popular ones. None stands for a service without plans
+    """
+    best_plans = []
+    for model in BEST_PLANS_MODELS:
+        best_plans.append(
+            model.objects.select_related('service')
+            .annotate(popularity=Count('ordered_plans'))
+            .order_by('-popularity', 'price', 'id')
+            .first()
+        )
+    return best_plans
+
+
+def refresh_best_plans() -> list:
+    """Ranks best plans and stores them in cache, so the main page is served without queries"""
+    best_plans = rank_best_plans()
+    cache.set(make_catalogue_key('best_plans'), best_plans, timeout=settings.BEST_PLANS_CACHE_TIMEOUT)
     return best_plans
 
 
+def get_best_plans() -> list:
+    """Returns a list of 3 Plan objects from cache, ranking them only if the cache is cold"""
+    return get_or_set_catalogue_data(('best_plans',), rank_best_plans, timeout=settings.BEST_PLANS_CACHE_TIMEOUT)
+
+
 def get_plan_model(slug: str):
     """Returns Plan object with passed service slug"""
     model = SERVICE_SLUG2PLAN_MODEL.get(slug)
@@ -37,84 +61,152 @@ def get_plan_model(slug: str):
 
 
 def get_plan_instance(s_slug, p_slug):
-    """Returns Plan object with passed service and plan slugs"""
-    plan = get_plan_model(s_slug).objects.get(slug=p_slug)
+    """
+    Returns Plan object with passed service and plan slugs, or raises Http404, if there's no such plan.
+    Resolved plans are cached together with their services until the catalogue is changed
+    """
+    model = get_plan_model(s_slug)
+    if model is None:
+        raise Http404(f'No service with slug "{s_slug}"')
+
+    plan = get_or_set_catalogue_data(
+        ('plan', s_slug, p_slug),
+        lambda: model.objects.select_related('service').filter(service__slug=s_slug, slug=p_slug).first()
+    )
+    if plan is None:
+        raise Http404(f'No plan with slug "{p_slug}" in "{s_slug}" service')
     return plan
 
 
-def is_service_in_use(service: Service, user: User) -> bool:
-    """Returns True if service has an ordered plan by user, otherwise False"""
-    plan_list = get_ordered_plan_list_by_user(user)
+def get_plan_order_flags(plan, user: User) -> tuple:
+    """
+    Returns (service_in_use, is_ordered) flags of passed plan for user with a single query.
+    Every plan model belongs to exactly one service, so the plan's content type stands for its service
+    """
+    content_type = ContentType.objects.get_for_model(plan)
+    # the customer is resolved in a subquery, so orders are searched by the (owner, plan) index, not joined
+    customer = Subquery(Customer.objects.filter(user=user).values('id')[:1])
+    flags = OrderedPlan.objects.filter(owner=customer, content_type=content_type).aggregate(
+        service_in_use=Count('id'),
+        is_ordered=Count('id', filter=Q(object_id=plan.id))
+    )
+    return bool(flags['service_in_use']), bool(flags['is_ordered'])
 
-    service_in_use = False
-    for item in plan_list.plans.all():
-        if item.content_object.service == service:
-            service_in_use = True
-            break
 
-    return service_in_use
+class OrderError(Exception):
+    """Raised when a plan can't be ordered by a customer"""
 
 
-def is_ordered(plan, user: User) -> bool:
-    """Returns True if passed plan is already in user's ordered plan list, otherwise False"""
-    plan_list = get_ordered_plan_list_by_user(user)
+class PlanAlreadyOrderedError(OrderError):
+    """Raised when the plan is already in customer's ordered plan list"""
 
-    plan_is_ordered = False
-    for item in plan_list.plans.all():
-        if item.content_object == plan:
-            plan_is_ordered = True
 
-    return plan_is_ordered
+class ServiceInUseError(OrderError):
+    """Raised when customer already has an ordered plan of the plan's service"""
 
 
-def get_plans_ordered_by_filter(model, q_filter):
-    """Returns filtered plans in a specific order (name, -name, price, -price)"""
-    try:
-        plans = model.objects.order_by(q_filter)
-    except FieldError:
-        plans = model.objects.all()
-    return plans
+class CustomerBlockedError(OrderError):
+    """Raised when customer is blocked for a debt on the account"""
 
 
-def create_ordered_plan(plan, user: User):
-    """Creates user's ordered plan"""
-    customer = Customer.objects.get(user=user)
-    plan_list = OrderedPlansList.objects.get(owner=customer)
-    ordered_plan = OrderedPlan.objects.create(
-        content_object=plan,
-        related_list=plan_list,
-        owner=customer
-    )
-    plan_list.plans.add(ordered_plan)
+CUSTOMER_ORDER_FIELDS = ('phone', 'city', 'street', 'house_num', 'apartment_num')
 
-    return ordered_plan
 
+def place_order(plan, user: User, order_data) -> OrderedPlan:
+    """
+    Creates user's ordered plan, adds its price to the list total
+    and fills customer's data from the order in one transaction.
+    Customer and the ordered plan list are locked while the order is placed, so concurrent orders of one customer
+    are serialized, and "one plan per service" rule, that the database enforces too, can't be broken by them
+    """
+    content_type = ContentType.objects.get_for_model(plan)
 
-def delete_ordered_plan(plan, user: User):
-    """Deletes user's ordered plan"""
-    customer = Customer.objects.get(user=user)
-    ordered_plan_list = OrderedPlansList.objects.get(owner=customer)
-    content_type = ContentType.objects.get(model=plan.__class__._meta.model_name)
-    ordered_plan = OrderedPlan.objects.get(
-        content_type=content_type,
-        object_id=plan.id,
-        owner=customer,
-        related_list=ordered_plan_list
-    )
-    ordered_plan_list.plans.remove(ordered_plan)
-    ordered_plan.delete()
+    with transaction.atomic():
+        plan_list = OrderedPlansList.objects.select_for_update().select_related('owner').get(owner__user=user)
+        customer = plan_list.owner
+        if customer.status == Customer.BLOCKED:
+            raise CustomerBlockedError(f'{customer} is blocked')
 
+        ordered_ids = list(
+            OrderedPlan.objects.filter(owner=customer, content_type=content_type).values_list('object_id', flat=True)
+        )
+        if plan.id in ordered_ids:
+            raise PlanAlreadyOrderedError(f'{plan} is already ordered')
+        if ordered_ids:
+            raise ServiceInUseError(f'{plan.service} already has an ordered plan')
 
-def update_customer_data_after_order(order_data, user: User):
-    """Fills customer's data to paste it into account info"""
-    customer = Customer.objects.get(user=user)
+        Customer.objects.filter(pk=customer.pk).update(**{field: order_data[field] for field in CUSTOMER_ORDER_FIELDS})
+        try:
+            with transaction.atomic():
+                ordered_plan = OrderedPlan.objects.create(
+                    content_type=content_type,
+                    object_id=plan.id,
+                    related_list=plan_list,
+                    owner=customer
+                )
+        except IntegrityError as error:
+            # the unique (owner, content type) constraint caught an order of the service, the check above missed
+            if OrderedPlan.objects.filter(owner=customer, content_type=content_type, object_id=plan.id).exists():
+                raise PlanAlreadyOrderedError(f'{plan} is already ordered') from error
+            raise ServiceInUseError(f'{plan.service} already has an ordered plan') from error
+        OrderedPlansList.objects.filter(pk=plan_list.pk).update(final_price=F('final_price') + plan.price)
+
+    return ordered_plan
 
-    customer.phone = order_data['phone']
-    customer.city = order_data['city']
-    customer.street = order_data['street']
-    customer.house_num = order_data['house_num']
-    customer.apartment_num = order_data['apartment_num']
-    customer.save()
+
+def delete_ordered_plan(plan, user: User):
+    """
+    Deletes user's ordered plan and recomputes the total of its ordered plan list in one transaction.
+    The total is recomputed instead of subtracting the plan price, as the price could change since the order
+    """
+    content_type = ContentType.objects.get_for_model(plan)
+
+    with transaction.atomic():
+        # the list of the ordered plan is locked like place_order locks it, so changes of the list are serialized
+        list_id = (
+            OrderedPlansList.objects.select_for_update(of=('self',))
+            .filter(
+                related_plans_list__owner__user=user,
+                related_plans_list__content_type=content_type,
+                related_plans_list__object_id=plan.id
+            )
+            .values_list('id', flat=True)
+            .first()
+        )
+        if list_id is None:
+            return
+        deleted, _ = OrderedPlan.objects.filter(
+            related_list_id=list_id, content_type=content_type, object_id=plan.id
+        ).delete()
+        if deleted:
+            recalculate_cart_totals(OrderedPlansList.objects.filter(pk=list_id))
+
+
+def recalculate_cart_totals(plans_lists=None) -> int:
+    """
+    Recomputes totals of passed ordered plan lists, all of them by default, from current prices of their plans
+    with a single UPDATE, returns amount of updated lists
+    """
+    price_field = OrderedPlansList._meta.get_field('final_price')
+    totals = [
+        Coalesce(
+            Subquery(
+                model.objects.filter(ordered_plans__related_list=OuterRef('pk'))
+                .values('ordered_plans__related_list')
+                .annotate(total=Sum('price'))
+                .values('total')[:1]
+            ),
+            Value(0),
+            output_field=DecimalField(max_digits=price_field.max_digits, decimal_places=price_field.decimal_places)
+        )
+        for model in SERVICE_SLUG2PLAN_MODEL.values()
+    ]
+    final_price = totals[0]
+    for total in totals[1:]:
+        final_price = final_price + total
+    if plans_lists is None:
+        plans_lists = OrderedPlansList.objects.all()
+    return plans_lists.update(final_price=final_price)
 
 
 def get_customer(user: User):
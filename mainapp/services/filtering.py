@@ -0,0 +1,102 @@
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.models import Q
+
+# a query param, that narrows plans down to the ones, which 'field' matches the param value by 'lookup'
+PlanFilter = namedtuple('PlanFilter', ['param', 'field', 'lookup'])
+
+
+class InvalidPlanFilters(ValueError):
+    """Raised when values of filter params are invalid, 'errors' is a dict of param and its error message"""
+
+    def __init__(self, errors: dict):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def get_plan_filters(model) -> list:
+    """
+    Returns filters of plans of passed model: 'min_<field>' and 'max_<field>' for its range fields,
+    and '<field>' with comma separated values for its facet fields
+    """
+    filters = []
+    for field in model.RANGE_FIELDS:
+        filters += [PlanFilter(f'min_{field}', field, 'gte'), PlanFilter(f'max_{field}', field, 'lte')]
+    filters += [PlanFilter(field, field, 'in') for field in model.FACET_FIELDS]
+    return filters
+
+
+def clean_field_value(field, value: str):
+    """
+    Returns passed value converted to python value of the field. Raises ValidationError, if the value isn't valid
+    for the field, or doesn't fit its column, e.g. an integer out of the column range, or a decimal with too many digits
+    """
+    try:
+        value = field.clean(value.strip(), None)
+    except OverflowError:
+        raise ValidationError('Ensure this value fits the field.')
+    # SQLite doesn't report integer column ranges, so the portable ranges of the field types are used
+    min_value, max_value = BaseDatabaseOperations.integer_field_ranges.get(field.get_internal_type(), (None, None))
+    if min_value is not None and value < min_value:
+        raise ValidationError(f'Ensure this value is greater than or equal to {min_value}.')
+    if max_value is not None and value > max_value:
+        raise ValidationError(f'Ensure this value is less than or equal to {max_value}.')
+    return value
+
+
+def clean_filter_value(model, plan_filter: PlanFilter, value: str):
+    """
+    Returns passed param value converted to python value of the filtered field, or a sorted list of them for 'in'
+    filters. Raises ValidationError, if the value isn't valid for the field, e.g. isn't one of its choices
+    or is out of its column range
+    """
+    field = model._meta.get_field(plan_filter.field)
+    if plan_filter.lookup == 'in':
+        return sorted({clean_field_value(field, item) for item in value.split(',')})
+    return clean_field_value(field, value)
+
+
+def clean_plan_filters(model, params, ignore_invalid: bool = False) -> dict:
+    """
+    Returns {param: value} of filter params of passed model, that are present in 'params'.
+    Raises InvalidPlanFilters, if some of them are invalid, or a range is empty,
+    unless 'ignore_invalid' is True, then invalid params are skipped
+    """
+    cleaned, errors = {}, {}
+    for plan_filter in get_plan_filters(model):
+        value = params.get(plan_filter.param)
+        if not value:
+            continue
+        try:
+            cleaned[plan_filter.param] = clean_filter_value(model, plan_filter, value)
+        except ValidationError as error:
+            errors[plan_filter.param] = error.messages[0]
+
+    for field in model.RANGE_FIELDS:
+        lower, upper = cleaned.get(f'min_{field}'), cleaned.get(f'max_{field}')
+        if lower is not None and upper is not None and lower > upper:
+            errors[f'max_{field}'] = f'Ensure this value is greater than or equal to min_{field}.'
+            del cleaned[f'max_{field}']
+
+    if errors and not ignore_invalid:
+        raise InvalidPlanFilters(errors)
+    return cleaned
+
+
+def get_plan_filter_q(model, cleaned: dict) -> Q:
+    """Returns a filter of plans of passed model by cleaned filter params"""
+    q_filter = Q()
+    for plan_filter in get_plan_filters(model):
+        if plan_filter.param in cleaned:
+            q_filter &= Q(**{f'{plan_filter.field}__{plan_filter.lookup}': cleaned[plan_filter.param]})
+    return q_filter
+
+
+def encode_plan_filters(cleaned: dict) -> dict:
+    """Returns cleaned filter params in their canonical form of query params"""
+    return {
+        param: ','.join(map(str, value)) if isinstance(value, list) else str(value)
+        for param, value in sorted(cleaned.items())
+    }
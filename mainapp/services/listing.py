@@ -0,0 +1,106 @@
+import base64
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Q
+
+from .filtering import get_plan_filter_q
+
+PlansPage = namedtuple('PlansPage', ['plans', 'next_cursor'])
+
+# the largest value of a bigint column, which plan ids and integer cursor values are limited to
+MAX_BIGINT = 9223372036854775807
+
+
+def get_sort_fields(model) -> tuple:
+    """Returns fields, plans of passed model can be sorted by"""
+    return 'name', 'price', model.HEADLINE_FIELD
+
+
+def parse_sort(model, q_filter) -> tuple:
+    """
+    Returns (field, descending) pair for passed filter (name, -name, price, -price, or plan's headline field),
+    plans are sorted by id if the filter isn't supported
+    """
+    q_filter = (q_filter or '').strip()
+    descending = q_filter.startswith('-')
+    field = q_filter.lstrip('-')
+    if field not in get_sort_fields(model):
+        return 'id', False
+    return field, descending
+
+
+def normalize_filter(model, q_filter) -> str:
+    """Returns passed filter in its canonical form, or an empty string if the filter isn't supported"""
+    field, descending = parse_sort(model, q_filter)
+    if field == 'id':
+        return ''
+    return f'-{field}' if descending else field
+
+
+def encode_cursor(plan, field: str) -> str:
+    """Returns an opaque cursor, pointing right after passed plan in a listing sorted by 'field'"""
+    value = getattr(plan, field)
+    raw = json.dumps([str(value), plan.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(model, field: str, cursor: str) -> tuple:
+    """
+    Returns (value, id) pair stored in the cursor, raises ValueError if the cursor is malformed,
+    its value is empty or isn't valid for the field, or its id isn't a positive bigint
+    """
+    try:
+        value, plan_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value = model._meta.get_field(field).clean(value, None)
+    except Exception as error:
+        raise ValueError(f'Invalid cursor "{cursor}"') from error
+    if isinstance(value, int) and not -MAX_BIGINT - 1 <= value <= MAX_BIGINT:
+        raise ValueError(f'Invalid cursor "{cursor}"')
+    if type(plan_id) is not int or not 0 < plan_id <= MAX_BIGINT:
+        raise ValueError(f'Invalid cursor "{cursor}"')
+    return value, plan_id
+
+
+def normalize_cursor(model, q_filter, cursor) -> str:
+    """Returns passed cursor if it's valid for the filter, otherwise an empty string"""
+    if not cursor:
+        return ''
+    try:
+        decode_cursor(model, parse_sort(model, q_filter)[0], cursor)
+    except ValueError:
+        return ''
+    return cursor
+
+
+def get_plans_page(model, q_filter, cursor: str = None, page_size: int = None, filters: dict = None) -> PlansPage:
+    """
+    Returns a page of plans sorted by passed filter, that starts right after the cursor,
+    and narrowed down by cleaned filter params in 'filters'.
+    Pages are fetched by keyset (sorted field, id), so the cost of a page doesn't depend on its position.
+    A malformed cursor points to the first page
+    """
+    page_size = page_size or settings.PLANS_PAGE_SIZE
+    field, descending = parse_sort(model, q_filter)
+    lookup = 'lt' if descending else 'gt'
+
+    plans = model.objects.select_related('service').filter(get_plan_filter_q(model, filters or {}))
+    if cursor:
+        try:
+            value, last_id = decode_cursor(model, field, cursor)
+        except ValueError:
+            pass
+        else:
+            plans = plans.filter(
+                Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': last_id})
+            )
+
+    prefix = '-' if descending else ''
+    plans = list(plans.order_by(f'{prefix}{field}', f'{prefix}id')[:page_size + 1])
+
+    next_cursor = None
+    if len(plans) > page_size:
+        plans = plans[:page_size]
+        next_cursor = encode_cursor(plans[-1], field)
+    return PlansPage(plans, next_cursor)
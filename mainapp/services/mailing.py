@@ -1,9 +1,94 @@
-from django.core.mail import send_mail
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from mainapp.models import QueuedMail
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MailDispatchReport:
+    """Outcome and throughput of one dispatch of mails"""
+
+    sent: int = 0
+    failed: dict = field(default_factory=dict)  # index of a message -> error
+    connections: int = 0
+    elapsed: float = 0
+
+    @property
+    def throughput(self) -> float:
+        """Returns amount of sent mails per second"""
+        return self.sent / self.elapsed if self.elapsed else 0
+
+
+def dispatch_messages(email_messages: list, batch_size: int = None) -> MailDispatchReport:
+    """
+    Sends passed EmailMessage objects reusing one mail server connection for every 'batch_size' messages,
+    so a TLS handshake is paid once per batch instead of once per message.
+    A failure of one message doesn't stop the rest, failed messages are reported by their index
+    """
+    batch_size = batch_size or settings.MAIL_CONNECTION_BATCH_SIZE
+    report = MailDispatchReport()
+    started = time.monotonic()
+
+    for batch_start in range(0, len(email_messages), batch_size):
+        batch = email_messages[batch_start:batch_start + batch_size]
+        try:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+        except Exception as error:
+            report.failed.update((batch_start + i, error) for i in range(len(batch)))
+            continue
+
+        report.connections += 1
+        try:
+            for i, message in enumerate(batch, start=batch_start):
+                try:
+                    connection.send_messages([message])
+                except Exception as error:
+                    report.failed[i] = error
+                else:
+                    report.sent += 1
+        finally:
+            connection.close()
+
+    report.elapsed = time.monotonic() - started
+    logger.info(
+        'Dispatched %s mails over %s connections in %.2fs (%.1f mails/s), %s failed',
+        report.sent, report.connections, report.elapsed, report.throughput, len(report.failed)
+    )
+    return report
+
+
+def send_bulk_mail(subject: str, message: str, recipients: list, batch_size: int = None) -> MailDispatchReport:
+    """Sends a separate copy of the mail to every recipient, e.g. billing reminders or plan change announcements"""
+    email_messages = [EmailMessage(subject, message, settings.EMAIL_HOST_USER, [recipient]) for recipient in recipients]
+    return dispatch_messages(email_messages, batch_size)
+
+
+def queue_mail(subject: str, message: str, recipients: list, from_email: str = None) -> QueuedMail:
+    """
+    Stores a mail in the outbox, it's delivered later by the mail worker (send_queued_mail command).
+    Called inside a transaction, the mail is queued only if the transaction commits
+    """
+    return QueuedMail.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        recipients=recipients
+    )
 
 
 def admin_order_mail(order_data, admin_mail):
-    """Sends notification order mail to 'admin_mail', with custom info passed to 'order_data' and 'plan_name'"""
+    """Queues notification order mail to 'admin_mail', with custom info passed to 'order_data' and 'plan_name'"""
     subject = 'New Order Shvarc'
     message = 'New order request was sent!\n' \
               f'Address: {order_data.get("city")} {order_data.get("street")} {order_data.get("house_num")}\n' \
@@ -11,15 +96,89 @@ def admin_order_mail(order_data, admin_mail):
               f'Phone: {order_data.get("phone")}\n' \
               f'Plan name: {order_data.get("plan")}\n'
     recipient = admin_mail
-    send_mail(subject, message, settings.EMAIL_HOST_USER, [recipient], fail_silently=False)
+    queue_mail(subject, message, [recipient])
 
 
 def customer_order_mail(order_data):
     """
-    Sends notification order mail to email passed in order submission form, with custom info passed to 'order_data'
+    Queues notification order mail to email passed in order submission form, with custom info passed to 'order_data'
     """
     subject = 'Order Plan in Shvarc'
     message = f'Hello, {order_data.get("first_name")}.\n' \
               f'Your order wes sent to our manager and he will connect with you soon.\nGood day!'
     recipient = order_data["email"]
-    send_mail(subject, message, settings.EMAIL_HOST_USER, [recipient], fail_silently=False)
+    queue_mail(subject, message, [recipient])
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """Returns delay before the next delivery attempt, which doubles after every failed attempt"""
+    return timedelta(seconds=settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim_queued_mails(batch_size: int) -> list:
+    """
+    Marks one batch of due mails as being sent by this worker and returns them.
+    Mails claimed by a worker that didn't report the result in MAIL_QUEUE_CLAIM_TIMEOUT are claimed again.
+    Rows are locked only for the short claiming transaction, so several workers can drain the outbox at once
+    """
+    now = timezone.now()
+    stale_claim = now - timedelta(seconds=settings.MAIL_QUEUE_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        mails = list(
+            QueuedMail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=QueuedMail.PENDING, next_attempt_at__lte=now)
+                | Q(status=QueuedMail.SENDING, claimed_at__lt=stale_claim)
+            )
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        QueuedMail.objects.filter(id__in=[mail.id for mail in mails]).update(
+            status=QueuedMail.SENDING, claimed_at=now
+        )
+
+    for mail in mails:
+        mail.status, mail.claimed_at = QueuedMail.SENDING, now
+    return mails
+
+
+def send_queued_mails(batch_size: int = None, max_attempts: int = None) -> dict:
+    """
+    Delivers one batch of due mails from the outbox, reusing mail server connections.
+    Mails are claimed first and sent outside of any transaction, the result of every mail is stored separately.
+    A failed mail is retried with exponential backoff, after 'max_attempts' failures it's marked as dead.
+    Returns amounts of sent, retried and dead mails, and throughput of the delivery
+    """
+    batch_size = batch_size or settings.MAIL_QUEUE_BATCH_SIZE
+    max_attempts = max_attempts or settings.MAIL_QUEUE_MAX_ATTEMPTS
+    stats = {'sent': 0, 'retried': 0, 'dead': 0, 'throughput': 0}
+
+    mails = claim_queued_mails(batch_size)
+    if not mails:
+        return stats
+
+    report = dispatch_messages(
+        [EmailMessage(mail.subject, mail.message, mail.from_email, mail.recipients) for mail in mails]
+    )
+
+    for i, mail in enumerate(mails):
+        # the claim is checked, so a mail claimed again after a timeout isn't overwritten by this worker
+        claimed_mail = QueuedMail.objects.filter(id=mail.id, status=QueuedMail.SENDING, claimed_at=mail.claimed_at)
+        error = report.failed.get(i)
+        if error is None:
+            claimed_mail.update(status=QueuedMail.SENT, sent_at=timezone.now())
+            stats['sent'] += 1
+            continue
+
+        attempts = mail.attempts + 1
+        if attempts >= max_attempts:
+            claimed_mail.update(status=QueuedMail.DEAD, attempts=attempts, last_error=repr(error))
+            stats['dead'] += 1
+        else:
+            claimed_mail.update(
+                status=QueuedMail.PENDING, attempts=attempts, last_error=repr(error),
+                next_attempt_at=timezone.now() + get_retry_delay(attempts)
+            )
+            stats['retried'] += 1
+
+    stats['throughput'] = report.throughput
+    return stats
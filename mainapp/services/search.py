@@ -0,0 +1,127 @@
+from collections import namedtuple, Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Count, Case, When, Value, CharField, BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from mainapp.models import PlanIndex
+
+SEARCH_CONFIG = 'english'
+
+# (label, lower bound, upper bound) of price facet, lower bounds are inclusive, upper ones are exclusive
+PRICE_BUCKETS = (
+    ('0-100', None, 100),
+    ('100-300', 100, 300),
+    ('300-600', 300, 600),
+    ('600+', 600, None),
+)
+
+# catalogue entry fields, that search results can be narrowed down by
+FACET_FIELDS = ('service', 'internet_type', 'quality', 'price')
+
+SearchResults = namedtuple('SearchResults', ['plans', 'facets'])
+
+
+def get_price_bucket_expression() -> Case:
+    """Returns an expression, that puts a catalogue entry into its price bucket"""
+    whens = [When(price__lt=upper, then=Value(label)) for label, _, upper in PRICE_BUCKETS if upper is not None]
+    return Case(*whens, default=Value(PRICE_BUCKETS[-1][0]), output_field=CharField())
+
+
+def get_price_bucket_filter(label: str) -> Q:
+    """Returns a filter of catalogue entries in the price bucket with passed label, or None for an unknown label"""
+    for bucket_label, lower, upper in PRICE_BUCKETS:
+        if bucket_label == label:
+            q_filter = Q()
+            if lower is not None:
+                q_filter &= Q(price__gte=lower)
+            if upper is not None:
+                q_filter &= Q(price__lt=upper)
+            return q_filter
+    return None
+
+
+def get_tsquery_sql() -> str:
+    """Returns SQL of the search query, parsed the way web search engines do it, the query is passed as a param"""
+    return f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+
+
+def match_plans(query: str):
+    """
+    Returns catalogue entries, that match passed query.
+    PostgreSQL matches the query against the GIN-indexed search vector of name, service name and description,
+    other databases, that are used for local runs, require every word of the query in one of these fields
+    """
+    entries = PlanIndex.objects.all()
+    if connection.vendor == 'postgresql':
+        return entries.filter(
+            RawSQL(f'"mainapp_planindex"."search_vector" @@ {get_tsquery_sql()}', [query], output_field=BooleanField())
+        )
+
+    for word in query.split():
+        entries = entries.filter(
+            Q(name__icontains=word) | Q(service_name__icontains=word) | Q(description__icontains=word)
+        )
+    return entries
+
+
+def rank_plans(entries, query: str):
+    """Orders catalogue entries by relevance to passed query, cheaper plans go first among equally relevant ones"""
+    if connection.vendor == 'postgresql':
+        entries = entries.annotate(rank=RawSQL(
+            f'ts_rank("mainapp_planindex"."search_vector", {get_tsquery_sql()})', [query], output_field=FloatField()
+        ))
+    else:
+        entries = entries.annotate(rank=Value(0.0, output_field=FloatField()))
+    return entries.order_by('-rank', 'price', 'id')
+
+
+def filter_by_facets(entries, facets: dict):
+    """Narrows catalogue entries down by passed facet values, unknown facets and values are ignored"""
+    if facets.get('service'):
+        entries = entries.filter(service__slug=facets['service'])
+    if facets.get('internet_type'):
+        entries = entries.filter(internet_type=facets['internet_type'])
+    if facets.get('quality'):
+        entries = entries.filter(quality=facets['quality'])
+    if facets.get('price'):
+        price_filter = get_price_bucket_filter(facets['price'])
+        if price_filter is not None:
+            entries = entries.filter(price_filter)
+    return entries
+
+
+def count_facets(entries) -> dict:
+    """
+    Returns a dict of facet field and a list of (value, amount of entries) pairs of passed catalogue entries.
+    Every combination of facet values is counted by a single GROUP BY query, and the counts are summed up per facet
+    """
+    rows = (
+        entries.order_by()
+        .annotate(price_bucket=get_price_bucket_expression())
+        .values('service__slug', 'internet_type', 'quality', 'price_bucket')
+        .annotate(amount=Count('id'))
+    )
+
+    counters = {field: Counter() for field in FACET_FIELDS}
+    for row in rows:
+        for field, value in zip(FACET_FIELDS, (row['service__slug'], row['internet_type'], row['quality'],
+                                               row['price_bucket'])):
+            if value is not None:
+                counters[field][value] += row['amount']
+
+    facets = {field: sorted(counter.items()) for field, counter in counters.items()}
+    facets['price'] = [(label, counters['price'][label]) for label, _, _ in PRICE_BUCKETS if counters['price'][label]]
+    return facets
+
+
+def search_plans(query: str, facets: dict = None, limit: int = None) -> SearchResults:
+    """
+    Returns the most relevant catalogue entries, that match passed query and facet values,
+    and facet counts of all matching entries. It takes two queries
+    """
+    limit = limit or settings.SEARCH_RESULTS_LIMIT
+    entries = filter_by_facets(match_plans(query), facets or {})
+    plans = list(rank_plans(entries.select_related('service'), query)[:limit])
+    return SearchResults(plans=plans, facets=count_facets(entries))
@@ -0,0 +1,54 @@
+from django.core.signals import request_started
+from django.db.models import ProtectedError
+from django.db.models.signals import post_save, pre_delete, post_delete
+
+from .db.health import check_persistent_connections
+from .models import Service
+from .services.caching import bump_catalogue_version
+from .services.catalogue import get_plan_models, sync_plan_index, remove_plan_index, sync_service_name
+
+
+def plan_saved(sender, instance, raw=False, **kwargs):
+    """Keeps the plan catalogue in sync with a saved plan"""
+    if not raw:
+        sync_plan_index(instance)
+    bump_catalogue_version()
+
+
+def plan_deleting(sender, instance, **kwargs):
+    """
+    Prevents deleting an ordered plan, as ordered plans of customers would be deleted with it,
+    confirmed ones included, and totals of their lists would be stale
+    """
+    ordered_plans = instance.ordered_plans.all()
+    if ordered_plans.exists():
+        raise ProtectedError(f'{instance} is ordered by customers and can\'t be deleted', ordered_plans)
+
+
+def plan_deleted(sender, instance, **kwargs):
+    """Removes a deleted plan from the plan catalogue"""
+    remove_plan_index(instance)
+    bump_catalogue_version()
+
+
+def service_changed(sender, instance, **kwargs):
+    """Invalidates cached catalogue data, that includes the changed service"""
+    bump_catalogue_version()
+
+
+def service_saved(sender, instance, raw=False, **kwargs):
+    """Keeps the service name in the plan catalogue up to date"""
+    if not raw:
+        sync_service_name(instance)
+
+
+for plan_model in get_plan_models():
+    post_save.connect(plan_saved, sender=plan_model, dispatch_uid=f'plan_index_save_{plan_model.__name__}')
+    pre_delete.connect(plan_deleting, sender=plan_model, dispatch_uid=f'plan_delete_protect_{plan_model.__name__}')
+    post_delete.connect(plan_deleted, sender=plan_model, dispatch_uid=f'plan_index_delete_{plan_model.__name__}')
+
+post_save.connect(service_changed, sender=Service, dispatch_uid='catalogue_service_save')
+post_save.connect(service_saved, sender=Service, dispatch_uid='plan_index_service_save')
+post_delete.connect(service_changed, sender=Service, dispatch_uid='catalogue_service_delete')
+
+request_started.connect(check_persistent_connections, dispatch_uid='check_persistent_connections')
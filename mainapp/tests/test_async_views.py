@@ -0,0 +1,94 @@
+import asyncio
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import path, include, reverse
+
+from .. import async_views
+from ..models import OrderedPlan, OrderedPlansList, QueuedMail
+from .test_views import create_service, create_net_plan, create_user_customer
+
+# the project urls with the async views in front of the sync ones, which have the same routes and names
+urlpatterns = [
+    path('', async_views.AsyncBaseView.as_view(), name='home'),
+    path('services/<str:slug>/', async_views.AsyncServiceDetailView.as_view(), name='service_details'),
+    path('plans/<str:s_slug>/<str:p_slug>/', async_views.AsyncPlanDetailView.as_view(), name='plan_details'),
+    path('order-submission/<str:s_slug>/<str:p_slug>/', async_views.order_submission, name='order_submission'),
+    path('', include('provider.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewsTestCase(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user_credentials = {'username': 'testuser', 'email': 'test@email.com', 'password': 'testing321'}
+        self.user, self.customer = create_user_customer(self.user_credentials)
+        OrderedPlansList.objects.create(owner=self.customer)
+        create_service()
+        self.plan = create_net_plan()
+
+    def test_views_are_async(self):
+        """Tests, that Django detects the views as coroutine functions, so they're run on the event loop"""
+        for view in urlpatterns[:4]:
+            self.assertTrue(asyncio.iscoroutinefunction(view.callback))
+
+    def test_home_page(self):
+        """Tests, that main page is rendered with the best plans, and other methods aren't allowed"""
+        response = self.client.get(reverse('home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('best_plans', response.context)
+        self.assertEqual(self.client.post(reverse('home')).status_code, 405)
+
+    async def test_service_page_is_cached(self):
+        """Tests, that an anonymous page is served from the cache, and clients with it get 304"""
+        url = reverse('service_details', kwargs={'slug': 'internet'})
+        response = await self.async_client.get(url, {'filter': 'price'})
+        cached = await self.async_client.get(url, {'filter': 'price'})
+        not_modified = await self.async_client.get(url, {'filter': 'price'}, **{'If-None-Match': response['ETag']})
+
+        self.assertContains(response, self.plan.get_absolute_url())
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['Vary'], 'Cookie')
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_plan_page_of_authenticated_user(self):
+        """Tests, that authenticated users get a fresh page with order flags"""
+        self.client.login(**self.user_credentials)
+        response = self.client.get(self.plan.get_absolute_url())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['is_ordered'])
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_order_submission_requires_login(self):
+        """Tests, that anonymous visitors are redirected to login page"""
+        response = self.client.get(self.plan.get_order_page())
+
+        self.assertRedirects(response, f'{reverse("login")}?next={self.plan.get_order_page()}',
+                             fetch_redirect_response=False)
+
+    def test_order_submission(self):
+        """Tests, that the order form is pre-filled, and a valid order is placed with its notification mails"""
+        self.client.login(**self.user_credentials)
+        form = self.client.get(self.plan.get_order_page()).context['order_form']
+        order_data = {
+            'first_name': 'Test',
+            'last_name': 'User',
+            'email': 'test@email.com',
+            'phone': '+380991111111',
+            'city': 'Kyiv',
+            'street': 'Main',
+            'house_num': 1,
+            'apartment_num': 2
+        }
+        response = self.client.post(self.plan.get_order_page(), order_data)
+        repeated = self.client.post(self.plan.get_order_page(), order_data)
+
+        self.assertEqual(form.initial['city'], 'test city')
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertRedirects(repeated, reverse('account'), fetch_redirect_response=False)
+        self.assertEqual(OrderedPlan.objects.filter(owner=self.customer).count(), 1)
+        self.assertEqual(QueuedMail.objects.count(), 2)
@@ -0,0 +1,20 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..services.benchmarks import seed_benchmark_data, run_view_benchmarks, VIEW_BUDGETS
+
+
+class ViewBenchmarksTestCase(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_views_are_within_query_budgets(self):
+        """Tests, that every view makes no more queries than its budget allows"""
+        data = seed_benchmark_data(plans_per_service=30, customers=50, max_cart_size=10)
+
+        results = run_view_benchmarks(data, repeat=2)
+
+        self.assertEqual({result.name for result in results}, set(VIEW_BUDGETS))
+        for result in results:
+            self.assertEqual(result.get_violations(check_latency=False), [])
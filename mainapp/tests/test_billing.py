@@ -0,0 +1,146 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Customer, Account, LedgerEntry, BillingRun, OrderedPlan, OrderedPlansList
+from ..services.billing import (
+    run_billing_cycle,
+    bill_customers_chunk,
+    top_up_account,
+    refresh_customer_statuses,
+    is_blocked
+)
+from .test_views import create_service, create_net_plan, create_tv_plan, create_user_customer
+
+
+class BillingTestCase(TestCase):
+
+    def setUp(self) -> None:
+        create_service()
+        create_service('Television', 'tv')
+        self.net_plan = create_net_plan(price=70)
+        self.tv_plan = create_tv_plan()
+        self.customers = []
+        for i in range(5):
+            user, customer = create_user_customer({'username': f'testuser{i}', 'password': 'testing321'})
+            plan_list = OrderedPlansList.objects.create(owner=customer)
+            for plan in (self.net_plan, self.tv_plan):
+                OrderedPlan.objects.create(content_object=plan, owner=customer, related_list=plan_list, confirmed=True)
+            self.customers.append(customer)
+
+    def test_billing_cycle_charges_confirmed_plans(self):
+        """Tests, that every customer is charged for confirmed plans only, and debtors are blocked"""
+        self.tv_plan.ordered_plans.filter(owner=self.customers[0]).update(confirmed=False)
+        top_up_account(self.customers[1], Decimal(500))
+
+        billing_run = run_billing_cycle('2026-10', chunk_size=2)
+
+        self.assertEqual(billing_run.billed_customers, 5)
+        self.assertIsNotNone(billing_run.finished_at)
+        self.assertEqual(Account.objects.get(customer=self.customers[0]).balance, -70)
+        self.assertEqual(Account.objects.get(customer=self.customers[1]).balance, 330)
+        self.assertEqual(
+            list(Customer.objects.filter(status=Customer.BLOCKED).order_by('id')),
+            [self.customers[0]] + self.customers[2:]
+        )
+
+    def test_billing_cycle_is_not_repeated(self):
+        """Tests, that running billing for the same period twice charges customers once"""
+        run_billing_cycle('2026-10')
+        run_billing_cycle('2026-10')
+
+        self.assertEqual(LedgerEntry.objects.filter(kind=LedgerEntry.CHARGE).count(), 5)
+        self.assertEqual(Account.objects.get(customer=self.customers[0]).balance, -170)
+
+    def test_chunk_is_billed_once(self):
+        """Tests, that billing the same chunk twice, e.g. by a retried run, charges its customers once"""
+        billing_run = BillingRun.objects.create(period='2026-10')
+        customer_ids = [customer.id for customer in self.customers[:2]]
+
+        self.assertEqual(bill_customers_chunk(billing_run, customer_ids), 2)
+        self.assertEqual(bill_customers_chunk(billing_run, customer_ids), 0)
+        self.assertEqual(LedgerEntry.objects.filter(account__customer=self.customers[0]).count(), 1)
+        self.assertEqual(Account.objects.get(customer=self.customers[0]).balance, -170)
+
+    def test_interrupted_billing_cycle_is_resumed(self):
+        """Tests, that billing continues after the last billed customer of an interrupted run"""
+        BillingRun.objects.create(period='2026-10', last_customer_id=self.customers[2].id)
+
+        call_command('run_billing', period='2026-10', chunk_size=2, stdout=StringIO())
+
+        self.assertFalse(Account.objects.filter(customer__in=self.customers[:3]).exists())
+        self.assertEqual(Account.objects.filter(customer__in=self.customers[3:], balance=-170).count(), 2)
+
+    def test_billing_queries_do_not_depend_on_chunk_size(self):
+        """Tests, that a chunk of customers is billed with the same amount of queries regardless of its size"""
+        with CaptureQueriesContext(connection) as small_chunk:
+            run_billing_cycle('2026-10', chunk_size=1000)
+
+        for i in range(5, 50):
+            user, customer = create_user_customer({'username': f'testuser{i}', 'password': 'testing321'})
+            plan_list = OrderedPlansList.objects.create(owner=customer)
+            OrderedPlan.objects.create(content_object=self.net_plan, owner=customer, related_list=plan_list,
+                                       confirmed=True)
+        with CaptureQueriesContext(connection) as big_chunk:
+            run_billing_cycle('2026-11', chunk_size=1000)
+
+        self.assertEqual(len(small_chunk), len(big_chunk))
+        self.assertEqual(Account.objects.filter(balance__lt=0).count(), 50)
+
+
+class CustomerStatusTestCase(TestCase):
+
+    def setUp(self) -> None:
+        create_service()
+        self.plan = create_net_plan(price=70)
+        self.user_credentials = {'username': 'testuser', 'password': 'testing321'}
+        self.user, self.customer = create_user_customer(self.user_credentials)
+        OrderedPlansList.objects.create(owner=self.customer)
+        self.account = Account.objects.create(customer=self.customer, balance=-10)
+
+    def test_refresh_blocks_and_unblocks_changed_accounts(self):
+        """Tests, that statuses are re-evaluated for changed accounts only"""
+        user, paid_up = create_user_customer({'username': 'paidup', 'password': 'testing321'})
+        paid_up.status = Customer.BLOCKED
+        paid_up.save()
+        Account.objects.create(customer=paid_up, balance=5)
+        user, untouched = create_user_customer({'username': 'untouched', 'password': 'testing321'})
+        Account.objects.create(customer=untouched, balance=-5)
+        Account.objects.filter(customer=untouched).update(status_dirty=False)
+
+        stats = refresh_customer_statuses(batch_size=1)
+
+        self.assertEqual(stats, {'blocked': 1, 'unblocked': 1})
+        self.assertTrue(is_blocked(self.user))
+        self.assertEqual(Customer.objects.get(pk=paid_up.pk).status, Customer.ACTIVE)
+        self.assertEqual(Customer.objects.get(pk=untouched.pk).status, Customer.ACTIVE)
+        self.assertFalse(Account.objects.filter(status_dirty=True).exists())
+
+    def test_top_up_unblocks_customer(self):
+        """Tests, that paying the debt off unblocks the customer at once"""
+        refresh_customer_statuses()
+
+        top_up_account(self.customer, Decimal(10))
+
+        self.assertFalse(is_blocked(self.user))
+
+    def test_blocked_customer_can_not_order(self):
+        """Tests, that a blocked customer sees a blocked order button and can't place an order"""
+        refresh_customer_statuses()
+        client = Client()
+        client.login(**self.user_credentials)
+
+        response = client.get(self.plan.get_absolute_url())
+        self.assertTrue(response.context['is_blocked'])
+        self.assertContains(response, 'Account blocked')
+
+        response = client.post(self.plan.get_order_page(), data={
+            'first_name': 'testname', 'last_name': 'testsurname', 'email': 'test@email.com',
+            'phone': '+380991111111', 'city': 'Kyiv', 'street': 'Main', 'house_num': 1, 'apartment_num': 1
+        })
+        self.assertRedirects(response, '/account/', fetch_redirect_response=False)
+        self.assertFalse(OrderedPlan.objects.exists())
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.http import Http404
+
+from ..models import PlanIndex, OrderedPlan, OrderedPlansList
+from ..services.caching import get_catalogue_version
+from ..services.db_operations import get_plan_instance
+from .test_views import create_service, create_net_plan, create_tv_plan, create_wireless_plan, create_user_customer
+
+
+class PlanIndexTestCase(TestCase):
+
+    def setUp(self) -> None:
+        create_service()
+        create_service('Wireless', 'wireless')
+        create_service('Television', 'tv')
+        self.net_plan = create_net_plan(price=70)
+        self.wireless_plan = create_wireless_plan()
+        self.tv_plan = create_tv_plan()
+
+    def test_entries_are_created_on_plan_save(self):
+        """Tests, that every saved plan gets a catalogue entry with its headline metric"""
+        entry = PlanIndex.objects.get(service__slug='internet', slug=self.net_plan.slug)
+
+        self.assertEqual(PlanIndex.objects.count(), 3)
+        self.assertEqual(entry.content_object, self.net_plan)
+        self.assertEqual(entry.headline_metric, 5)
+        self.assertEqual(entry.get_absolute_url(), self.net_plan.get_absolute_url())
+
+    def test_entry_is_updated_on_plan_change(self):
+        """Tests, that changes of a plan are reflected in its catalogue entry"""
+        self.tv_plan.price = 10
+        self.tv_plan.name = 'TV Lite'
+        self.tv_plan.save()
+
+        entry = PlanIndex.objects.get(service__slug='tv', slug=self.tv_plan.slug)
+        self.assertEqual(entry.name, 'TV Lite')
+        self.assertEqual(PlanIndex.objects.order_by('price').first(), entry)
+
+    def test_entry_is_removed_on_plan_delete(self):
+        """Tests, that a deleted plan disappears from the catalogue"""
+        self.wireless_plan.delete()
+
+        self.assertEqual(
+            [entry.slug for entry in PlanIndex.objects.order_by('price')], [self.net_plan.slug, self.tv_plan.slug]
+        )
+        self.assertFalse(PlanIndex.objects.filter(service__slug='wireless').exists())
+
+    def test_ordered_plan_is_protected(self):
+        """Tests, that a plan, which is ordered by a customer, can't be deleted with the order"""
+        customer = create_user_customer({'username': 'test', 'password': 'testpass321'})[1]
+        plans_list = OrderedPlansList.objects.create(owner=customer)
+        OrderedPlan.objects.create(content_object=self.net_plan, owner=customer, related_list=plans_list,
+                                   confirmed=True)
+
+        with self.assertRaises(ProtectedError), transaction.atomic():
+            self.net_plan.delete()
+        self.assertTrue(OrderedPlan.objects.filter(object_id=self.net_plan.id).exists())
+        self.assertTrue(PlanIndex.objects.filter(object_id=self.net_plan.id, service__slug='internet').exists())
+
+    def test_rebuild_command(self):
+        """Tests, that the catalogue is fully restored from plan tables"""
+        PlanIndex.objects.all().delete()
+        version = get_catalogue_version()
+
+        call_command('rebuild_plan_index', stdout=StringIO())
+
+        self.assertEqual(PlanIndex.objects.count(), 3)
+        self.assertGreater(get_catalogue_version(), version)
+        self.assertEqual(PlanIndex.objects.order_by('price').first().content_object, self.net_plan)
+
+
+class PlanResolutionCacheTestCase(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_service()
+        self.plan = create_net_plan()
+
+    def test_resolved_plan_is_cached(self):
+        """Tests, that a resolved plan and its service are served from cache afterwards"""
+        get_plan_instance('internet', self.plan.slug)
+
+        with self.assertNumQueries(0):
+            plan = get_plan_instance('internet', self.plan.slug)
+            self.assertEqual(plan.get_absolute_url(), self.plan.get_absolute_url())
+
+    def test_cache_is_invalidated_on_plan_change(self):
+        """Tests, that a changed or deleted plan isn't served from cache"""
+        get_plan_instance('internet', self.plan.slug)
+
+        self.plan.price = 5
+        self.plan.save()
+        self.assertEqual(get_plan_instance('internet', self.plan.slug).price, 5)
+
+        self.plan.delete()
+        with self.assertRaises(Http404):
+            get_plan_instance('internet', 'net5')
+
+    def test_unknown_slugs(self):
+        """Tests, that unknown service or plan slugs raise Http404"""
+        with self.assertRaises(Http404):
+            get_plan_instance('weird', self.plan.slug)
+        with self.assertRaises(Http404):
+            get_plan_instance('internet', 'weird')
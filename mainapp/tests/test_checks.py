@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..checks import check_shared_cache
+
+DATABASE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_table',
+    }
+}
+
+
+class SharedCacheCheckTestCase(SimpleTestCase):
+
+    @override_settings(SHARED_CACHE_REQUIRED=True)
+    def test_local_cache_is_reported(self):
+        """Tests, that a cache local to a process is an error, when a shared cache is required"""
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['mainapp.E001'])
+
+    @override_settings(SHARED_CACHE_REQUIRED=True, CACHES=DATABASE_CACHES)
+    def test_shared_cache_passes(self):
+        """Tests, that a shared cache passes the check"""
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(SHARED_CACHE_REQUIRED=False)
+    def test_local_cache_is_allowed_in_debug(self):
+        """Tests, that a cache local to a process is allowed, when a shared cache isn't required"""
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import InternetPlan, TVPlan, PlanIndex, Customer, Account, OrderedPlan, OrderedPlansList
+from ..services.caching import get_catalogue_version
+from ..services.datagen import generate_data, format_copy_value
+
+
+class DataGeneratorTestCase(TestCase):
+
+    def test_data_is_generated(self):
+        """Tests, that plans, customers with accounts and carts are created, and denormalized data is refreshed"""
+        call_command('generate_data', plans_per_service=15, customers=25, max_cart_size=5, batch_size=10,
+                     stdout=StringIO())
+
+        self.assertEqual(InternetPlan.objects.count(), 15)
+        self.assertEqual(PlanIndex.objects.count(), 45)
+        self.assertEqual(User.objects.filter(username__startswith='gen').count(), 25)
+        self.assertEqual(Account.objects.count(), 25)
+        self.assertFalse(Customer.objects.filter(status=Customer.BLOCKED, account__balance__gte=0).exists())
+        self.assertTrue(OrderedPlan.objects.exists())
+        for plans_list in OrderedPlansList.objects.all():
+            expected = sum(ordered_plan.content_object.price for ordered_plan in plans_list.related_plans_list.all())
+            self.assertEqual(plans_list.final_price, expected)
+
+    def test_generation_is_deterministic(self):
+        """Tests, that the same seed generates the same plans and carts"""
+        def generate(prefix):
+            generate_data(plans_per_service=10, customers=10, max_cart_size=5, seed=3, prefix=prefix)
+            return (
+                list(TVPlan.objects.filter(slug__startswith=f'{prefix}-').order_by('id').values_list('price', flat=True)),
+                list(OrderedPlansList.objects.filter(owner__user__username__startswith=prefix)
+                     .order_by('id').values_list('final_price', flat=True))
+            )
+
+        self.assertEqual(generate('first'), generate('second'))
+
+    def test_catalogue_cache_is_invalidated(self):
+        """Tests, that cached catalogue data is invalidated, though plans are loaded without signals"""
+        version = get_catalogue_version()
+
+        generate_data(plans_per_service=5, customers=0, max_cart_size=0, refresh=False)
+
+        self.assertGreater(get_catalogue_version(), version)
+
+    def test_copy_value_format(self):
+        """Tests, that values are escaped for COPY text format"""
+        self.assertEqual(format_copy_value(None), '\\N')
+        self.assertEqual(format_copy_value('a\tb\nc\\'), 'a\\tb\\nc\\\\')
+        self.assertEqual(format_copy_value(True), 'True')
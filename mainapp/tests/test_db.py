@@ -0,0 +1,179 @@
+import json
+import threading
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..db.health import check_persistent_connections
+from ..db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+
+    def __init__(self, number: int):
+        self.number = number
+        self.closed = False
+
+
+def create_pool(**kwargs) -> ConnectionPool:
+    """Returns a pool of fake connections, which are numbered in order they're opened, and are always usable"""
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection(len(opened)))
+        return opened[-1]
+
+    options = {'check': lambda connection: True, 'close': lambda connection: setattr(connection, 'closed', True)}
+    options.update(kwargs)
+    return ConnectionPool(connect=connect, **options)
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+
+    def test_connections_are_reused(self):
+        """Tests, that released connections are handed out again, the most recently released one first"""
+        pool = create_pool(max_size=2)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        self.assertIs(pool.acquire(), second)
+        self.assertEqual(pool.get_stats()['opened'], 2)
+        self.assertEqual(pool.get_stats()['saturation'], 0.5)
+
+    def test_full_pool_times_out(self):
+        """Tests, that a thread waits for a free connection only until the timeout"""
+        pool = create_pool(max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.get_stats()['timeouts'], 1)
+
+    def test_waiting_thread_gets_released_connection(self):
+        """Tests, that a thread waiting for a connection gets the one, that is released by another thread"""
+        pool = create_pool(max_size=1, timeout=5)
+        connection = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        pool.release(connection)
+        waiter.join()
+
+        self.assertEqual(acquired, [connection])
+
+    def test_broken_connections_are_replaced(self):
+        """Tests, that an idle connection, which fails a health check, is closed and replaced by a new one"""
+        pool = create_pool(check=lambda connection: False, health_check_interval=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        replacement = pool.acquire()
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(replacement.number, 1)
+        self.assertEqual(pool.get_stats()['health_check_failures'], 1)
+        self.assertEqual(pool.get_stats()['size'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        """Tests, that a connection, which failed to open, doesn't take a place in the pool"""
+        def connect():
+            raise ConnectionError
+
+        pool = ConnectionPool(connect=connect, check=None, close=None, max_size=1)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                pool.acquire()
+        self.assertEqual(pool.get_stats()['size'], 0)
+
+    def test_discarded_connections_are_closed(self):
+        """Tests, that a discarded connection is closed and frees its place"""
+        pool = create_pool(max_size=1)
+        connection = pool.acquire()
+        pool.release(connection, discard=True)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.acquire().number, 1)
+
+
+class PersistentConnectionsTestCase(SimpleTestCase):
+
+    @staticmethod
+    def create_connection(is_usable: bool) -> SimpleNamespace:
+        """Returns a fake database connection wrapper with an open persistent connection"""
+        return SimpleNamespace(
+            connection=object(), settings_dict={'CONN_MAX_AGE': 60}, in_atomic_block=False,
+            is_usable=mock.Mock(return_value=is_usable), close=mock.Mock()
+        )
+
+    @override_settings(DB_HEALTH_CHECK_INTERVAL=0)
+    def test_broken_connections_are_closed(self):
+        """Tests, that persistent connections are checked after an interval, and broken ones are closed"""
+        healthy, broken = self.create_connection(True), self.create_connection(False)
+
+        with mock.patch('mainapp.db.health.connections') as connections:
+            connections.all.return_value = [healthy, broken]
+            check_persistent_connections()
+            broken.is_usable.assert_not_called()
+            check_persistent_connections()
+
+        healthy.close.assert_not_called()
+        broken.close.assert_called_once()
+
+
+@override_settings(DB_HEALTH_ENDPOINT_INTERVAL=60)
+@mock.patch.dict('mainapp.db.health._last_health_check', {'ok': False, 'checked_at': None})
+class DatabaseHealthTestCase(TestCase):
+
+    def test_health_endpoint(self):
+        """Tests, that health endpoint reports only whether databases answer"""
+        response = self.client.get(reverse('database_health'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'ok': True})
+
+    def test_unhealthy_database(self):
+        """Tests, that health endpoint responds with 503 without details, if a database doesn't answer"""
+        with mock.patch('mainapp.db.health.ping_database', return_value={'ok': False, 'error': 'down'}):
+            response = self.client.get(reverse('database_health'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'ok': False})
+
+    def test_databases_are_pinged_once_per_interval(self):
+        """Tests, that frequent hits of health endpoint reuse the result of the last ping"""
+        with mock.patch('mainapp.db.health.ping_database', return_value={'ok': True}) as ping_database:
+            self.client.get(reverse('database_health'))
+            self.client.get(reverse('database_health'))
+
+        self.assertEqual(ping_database.call_count, 1)
+
+    def test_details_are_shown_to_staff(self):
+        """Tests, that staff gets ping results of every database and pool statistics of the serving worker"""
+        pools_stats = {'default': {'in_use': 1, 'saturation': 0.1, 'avg_wait_ms': 0.5}}
+        self.client.force_login(get_user_model().objects.create_user('admin', password='testing321', is_staff=True))
+
+        with mock.patch('mainapp.db.health.get_pools_stats', return_value=pools_stats):
+            response = self.client.get(reverse('database_health_details'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['databases']['default']['ok'])
+        self.assertEqual(response.json()['pools'], pools_stats)
+
+    def test_details_are_hidden_from_visitors(self):
+        """Tests, that health details aren't shown to anonymous visitors and customers"""
+        self.assertEqual(self.client.get(reverse('database_health_details')).status_code, 302)
+
+        self.client.force_login(get_user_model().objects.create_user('customer', password='testing321'))
+        self.assertEqual(self.client.get(reverse('database_health_details')).status_code, 302)
+
+    def test_command(self):
+        """Tests, that the command reports connection setup time"""
+        out = StringIO()
+        call_command('check_db_connections', '--repeat', '2', stdout=out)
+
+        self.assertIn('connection_setup_ms', json.loads(out.getvalue())['databases']['default'])
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import InternetPlan, WirelessPlan
+from ..services.filtering import clean_plan_filters, encode_plan_filters, InvalidPlanFilters
+from ..services.listing import get_plans_page
+from .test_views import create_service, create_net_plan, create_wireless_plan
+
+
+class PlanFiltersTestCase(TestCase):
+
+    def test_params_are_cleaned(self):
+        """Tests, that filter params are converted to values of the filtered fields"""
+        filters = clean_plan_filters(WirelessPlan, {
+            'min_data_amount': '10', 'max_price': '99.5', 'internet_type': '5G,4G', 'speed': '100'
+        })
+
+        self.assertEqual(filters, {'min_data_amount': 10, 'max_price': Decimal('99.5'), 'internet_type': ['4G', '5G']})
+        self.assertEqual(encode_plan_filters(filters),
+                         {'internet_type': '4G,5G', 'max_price': '99.5', 'min_data_amount': '10'})
+
+    def test_invalid_params(self):
+        """Tests, that invalid values and empty ranges are reported per param, or skipped if it's asked"""
+        params = {'min_data_amount': 'many', 'internet_type': '6G', 'min_price': '10', 'max_price': '5'}
+
+        with self.assertRaises(InvalidPlanFilters) as context:
+            clean_plan_filters(WirelessPlan, params)
+        self.assertEqual(set(context.exception.errors), {'min_data_amount', 'internet_type', 'max_price'})
+        self.assertEqual(clean_plan_filters(WirelessPlan, params, ignore_invalid=True), {'min_price': 10})
+
+    def test_out_of_range_params(self):
+        """Tests, that values, which don't fit the filtered column, are invalid"""
+        params = {'min_speed': '99999999999999999999999', 'max_speed': '-2147483649', 'max_price': '1e400'}
+
+        with self.assertRaises(InvalidPlanFilters) as context:
+            clean_plan_filters(InternetPlan, params)
+        self.assertEqual(set(context.exception.errors), set(params))
+        self.assertEqual(clean_plan_filters(InternetPlan, {'min_speed': '2147483647'}), {'min_speed': 2147483647})
+
+
+class FilteredListingTestCase(TestCase):
+
+    def setUp(self) -> None:
+        create_service()
+        create_service('Wireless', 'wireless')
+        self.slow_plan = create_net_plan('Slow', 'slow', price=50)
+        self.fast_plan = create_net_plan('Fast', 'fast', price=200)
+        InternetPlan.objects.filter(pk=self.fast_plan.pk).update(speed=1000)
+        self.plan_4g = create_wireless_plan('Plan 4G', 'plan4g')
+        self.plan_5g = create_wireless_plan('Plan 5G', 'plan5g')
+        WirelessPlan.objects.filter(pk=self.plan_5g.pk).update(internet_type='5G', data_amount=50)
+
+    def test_listing_is_filtered(self):
+        """Tests, that a page of plans is narrowed down by range and facet filters"""
+        self.assertEqual(get_plans_page(InternetPlan, 'price', filters={'min_speed': 500}).plans, [self.fast_plan])
+        self.assertEqual(
+            get_plans_page(WirelessPlan, None, filters={'internet_type': ['5G'], 'max_data_amount': 100}).plans,
+            [self.plan_5g]
+        )
+
+    def test_service_page_is_filtered(self):
+        """Tests, that service page shows filtered plans, ignores invalid filters and keeps filters in links"""
+        url = reverse('service_details', kwargs={'slug': 'internet'})
+        response = self.client.get(url, {'filter': 'price', 'max_price': '100', 'min_speed': 'fast'})
+
+        self.assertEqual(response.context['service_plans'], [self.slow_plan])
+        self.assertEqual(response.context['plan_filters'], {'max_price': '100'})
+        self.assertContains(response, '?filter=-price&max_price=100')
+
+    def test_out_of_range_filter_is_ignored(self):
+        """Tests, that service page ignores a filter value, that doesn't fit the filtered column"""
+        url = reverse('service_details', kwargs={'slug': 'internet'})
+        response = self.client.get(url, {'filter': 'price', 'min_speed': '99999999999999999999999'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['plan_filters'], {})
+
+    def test_filtered_pages_are_cached_separately(self):
+        """Tests, that filters are a part of the cached page key"""
+        url = reverse('service_details', kwargs={'slug': 'wireless'})
+        self.client.get(url, {'internet_type': '5G'})
+        response = self.client.get(url, {'internet_type': '4G'})
+
+        self.assertContains(response, self.plan_4g.get_absolute_url())
+        self.assertNotContains(response, self.plan_5g.get_absolute_url())
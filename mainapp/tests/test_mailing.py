@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
+
+from ..models import QueuedMail, OrderedPlansList
+from ..services.mailing import queue_mail, send_queued_mails, send_bulk_mail
+from .test_views import create_service, create_net_plan, create_user_customer
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """Mail backend, that fails to deliver any message"""
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP is down')
+
+
+class PickyEmailBackend(locmem.EmailBackend):
+    """Mail backend, that fails to deliver messages to 'bounce@email.com'"""
+
+    def send_messages(self, messages):
+        if any('bounce@email.com' in message.to for message in messages):
+            raise ConnectionError('Mailbox unavailable')
+        return super().send_messages(messages)
+
+
+class ClaimCheckingEmailBackend(locmem.EmailBackend):
+    """Mail backend, that fails if a message is sent while its queued mail isn't claimed"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            queued_mail = QueuedMail.objects.get(recipients=message.to)
+            if queued_mail.status != QueuedMail.SENDING or queued_mail.claimed_at is None:
+                raise AssertionError('Mail is sent without claiming')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='mainapp.tests.test_mailing.PickyEmailBackend')
+class DispatchMessagesTestCase(TestCase):
+
+    def test_connection_is_reused_per_batch(self):
+        """Tests, that messages are sent over one connection per batch and failures don't stop the rest"""
+        recipients = ['a@email.com', 'bounce@email.com', 'b@email.com', 'c@email.com', 'd@email.com']
+
+        report = send_bulk_mail('Billing reminder', 'Message', recipients, batch_size=2)
+
+        self.assertEqual(report.connections, 3)
+        self.assertEqual(report.sent, 4)
+        self.assertEqual(list(report.failed), [1])
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['a@email.com'], ['b@email.com'], ['c@email.com'], ['d@email.com']])
+        self.assertGreater(report.throughput, 0)
+
+
+class OrderMailQueueTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.user_credentials = {
+            'username': 'testuser',
+            'first_name': 'testname',
+            'last_name': 'testsurname',
+            'email': 'test@email.com',
+            'password': 'testing321'
+        }
+        self.user, self.customer = create_user_customer(self.user_credentials)
+        OrderedPlansList.objects.create(owner=self.customer)
+        create_service()
+        self.plan = create_net_plan()
+
+    def test_order_queues_mails_without_sending(self):
+        """Tests, that an order stores both notification mails in the outbox instead of sending them"""
+        self.client.login(**self.user_credentials)
+
+        self.client.post(self.plan.get_order_page(), data={
+            'plan': self.plan.name,
+            'first_name': self.user.first_name,
+            'last_name': self.user.last_name,
+            'email': self.user.email,
+            'phone': '0674324959',
+            'city': 'Kharkiv',
+            'street': 'Teststreet',
+            'house_num': 13,
+            'apartment_num': 58
+        })
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(QueuedMail.objects.values_list('recipients', flat=True)),
+            [['kykucak@gmail.com'], [self.user.email]]
+        )
+
+    def test_worker_drains_outbox(self):
+        """Tests, that the mail worker sends all due mails and marks them as sent"""
+        for i in range(3):
+            queue_mail('Subject', 'Message', [f'customer{i}@email.com'])
+
+        call_command('send_queued_mail', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(QueuedMail.objects.filter(status=QueuedMail.SENT).count(), 3)
+
+    @override_settings(EMAIL_BACKEND='mainapp.tests.test_mailing.FailingEmailBackend', MAIL_QUEUE_RETRY_DELAY=60)
+    def test_failed_mail_is_retried_with_backoff_then_dead(self):
+        """Tests, that a failed mail is postponed with growing delays and becomes dead after max attempts"""
+        queued_mail = queue_mail('Subject', 'Message', ['customer@email.com'])
+
+        self.assertEqual(send_queued_mails(max_attempts=3)['retried'], 1)
+        queued_mail.refresh_from_db()
+        first_delay = queued_mail.next_attempt_at - timezone.now()
+        self.assertEqual(queued_mail.attempts, 1)
+        self.assertIn('SMTP is down', queued_mail.last_error)
+        # the mail isn't due yet
+        self.assertEqual(send_queued_mails(max_attempts=3)['retried'], 0)
+
+        QueuedMail.objects.update(next_attempt_at=timezone.now())
+        send_queued_mails(max_attempts=3)
+        queued_mail.refresh_from_db()
+        self.assertGreater(queued_mail.next_attempt_at - timezone.now(), first_delay)
+
+        QueuedMail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_queued_mails(max_attempts=3)['dead'], 1)
+        queued_mail.refresh_from_db()
+        self.assertEqual(queued_mail.status, QueuedMail.DEAD)
+
+    @override_settings(EMAIL_BACKEND='mainapp.tests.test_mailing.ClaimCheckingEmailBackend')
+    def test_mails_are_claimed_before_sending(self):
+        """Tests, that mails are marked as being sent before delivery, and the claim is replaced by the result"""
+        queue_mail('Subject', 'Message', ['customer@email.com'])
+
+        self.assertEqual(send_queued_mails()['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(QueuedMail.objects.get().status, QueuedMail.SENT)
+
+    @override_settings(MAIL_QUEUE_CLAIM_TIMEOUT=600)
+    def test_stale_claim_is_claimed_again(self):
+        """Tests, that a mail of a worker, that didn't report the result in time, is sent by another worker"""
+        fresh_mail = queue_mail('Subject', 'Message', ['fresh@email.com'])
+        stale_mail = queue_mail('Subject', 'Message', ['stale@email.com'])
+        QueuedMail.objects.filter(id=fresh_mail.id).update(status=QueuedMail.SENDING, claimed_at=timezone.now())
+        QueuedMail.objects.filter(id=stale_mail.id).update(
+            status=QueuedMail.SENDING, claimed_at=timezone.now() - timedelta(seconds=601)
+        )
+
+        self.assertEqual(send_queued_mails()['sent'], 1)
+        self.assertEqual([message.to for message in mail.outbox], [['stale@email.com']])
+        fresh_mail.refresh_from_db()
+        self.assertEqual(fresh_mail.status, QueuedMail.SENDING)
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, Client, RequestFactory, override_settings
+
+from ..middleware import QueryInstrumentationMiddleware, get_query_fingerprint
+from .test_views import create_service, create_net_plan
+
+
+@override_settings(SQL_INSTRUMENTATION=True)
+class QueryInstrumentationMiddlewareTestCase(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_service()
+        create_net_plan()
+
+    def test_server_timing_header(self):
+        """Tests, that requests to project views get query count and timings in Server-Timing header"""
+        client = Client()
+
+        with self.assertLogs('mainapp.middleware', 'INFO') as logs:
+            response = client.get('/services/internet/')
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, dup;')
+        self.assertIn('"view": "mainapp.views.ServiceDetailView"', logs.output[0])
+        self.assertFalse(client.get('/api/services/').has_header('Server-Timing'))
+
+    def test_repeated_queries_are_flagged(self):
+        """Tests, that a query shape repeated in a loop is logged as a possible N+1"""
+        def view(request):
+            for user_id in range(3):
+                User.objects.filter(id=user_id).exists()
+            return HttpResponse()
+        view.__module__ = 'mainapp.views'
+
+        request = RequestFactory().get('/')
+        middleware = QueryInstrumentationMiddleware(lambda request: middleware.process_view(request, view, (), {})
+                                                    or view(request))
+
+        with self.assertLogs('mainapp.middleware', 'WARNING') as logs:
+            response = middleware(request)
+
+        self.assertIn('dup;desc="1 repeated query shapes"', response['Server-Timing'])
+        self.assertIn('"n_plus_one": true', logs.output[0])
+
+    def test_query_fingerprint(self):
+        """Tests, that queries with IN lists of different length have the same fingerprint"""
+        self.assertEqual(
+            get_query_fingerprint('SELECT 1 WHERE id IN (%s, %s, %s)'), get_query_fingerprint('SELECT 1 WHERE id IN (%s)')
+        )
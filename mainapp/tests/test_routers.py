@@ -0,0 +1,146 @@
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TransactionTestCase, RequestFactory, override_settings
+from django.urls import reverse
+
+from ..db.routers import ReplicaRouter, pinned_to_primary, wrote_to_primary, use_primary
+from ..middleware import ReplicaStickinessMiddleware
+from ..models import Service, Customer
+from ..services.caching import CATALOGUE_MODIFIED_KEY, CATALOGUE_VERSION_KEY
+from .test_views import create_service, create_net_plan
+
+REPLICA = 'replica'
+
+
+class RoutingStateMixin:
+    """Resets routing state of the test thread, which is left by writes of previous tests, and restores it after"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.routing_tokens = pinned_to_primary.set(False), wrote_to_primary.set(False)
+        cache.set_many({CATALOGUE_VERSION_KEY: 1, CATALOGUE_MODIFIED_KEY: time.time() - 60}, timeout=None)
+
+    def tearDown(self) -> None:
+        pinned_to_primary.reset(self.routing_tokens[0])
+        wrote_to_primary.reset(self.routing_tokens[1])
+        super().tearDown()
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_STICKINESS_SECONDS=5)
+class ReplicaRouterTestCase(RoutingStateMixin, SimpleTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_replicas(self):
+        """Tests, that reads go to replicas, and writes to the primary database"""
+        self.assertEqual(self.router.db_for_read(Service), REPLICA)
+        self.assertEqual(self.router.db_for_write(Customer), 'default')
+
+    def test_reads_after_write_go_to_primary(self):
+        """Tests, that reads, which follow a write, go to the primary database"""
+        self.router.db_for_write(Customer)
+
+        self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        """Tests, that reads can be pinned to the primary database"""
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Service), 'default')
+        self.assertEqual(self.router.db_for_read(Service), REPLICA)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Tests, that everything goes to the primary database, if there are no replicas"""
+        self.assertEqual(self.router.db_for_read(Service), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_STICKINESS_SECONDS=5)
+class ReplicaStickinessMiddlewareTestCase(RoutingStateMixin, SimpleTestCase):
+
+    def get_response(self, request) -> HttpResponse:
+        """A view, that writes, if it's asked, and tells the database, its reads go to"""
+        if request.GET.get('write'):
+            ReplicaRouter().db_for_write(Customer)
+        return HttpResponse(ReplicaRouter().db_for_read(Customer))
+
+    def request(self, path: str = '/', **cookies) -> HttpResponse:
+        request = RequestFactory().get(path)
+        request.COOKIES.update(cookies)
+        return ReplicaStickinessMiddleware(self.get_response)(request)
+
+    def test_client_is_pinned_after_write(self):
+        """Tests, that a client, which has written, gets a cookie, which pins its reads to the primary database"""
+        read_response = self.request()
+        write_response = self.request('/?write=1')
+        pinned_response = self.request(**{'use_primary': '1'})
+
+        self.assertEqual(read_response.content, REPLICA.encode())
+        self.assertNotIn('use_primary', read_response.cookies)
+        self.assertEqual(write_response.cookies['use_primary']['max-age'], 5)
+        self.assertEqual(pinned_response.content, b'default')
+
+    def test_reads_after_catalogue_change_go_to_primary(self):
+        """Tests, that all reads go to the primary database right after a change of the catalogue"""
+        cache.set(CATALOGUE_MODIFIED_KEY, time.time(), timeout=None)
+
+        self.assertEqual(self.request().content, b'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_disabled_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaStickinessMiddleware(self.get_response)
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_STICKINESS_SECONDS=5)
+class ReplicaDatabaseTestCase(RoutingStateMixin, TransactionTestCase):
+    """
+    Routing between two local SQLite databases. The replica is a separate in-memory database, that isn't replicated,
+    so what is read from it shows where reads go. It's added after the test databases are set up, as it isn't
+    in the settings, and it only gets the schema, so it doesn't need a flush
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        connections.settings[REPLICA] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+        connections.ensure_defaults(REPLICA)
+        connections.prepare_test_settings(REPLICA)
+        call_command('migrate', database=REPLICA, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        create_service()
+        create_net_plan()
+        super().setUp()
+
+    def test_reads_are_routed(self):
+        """Tests, that reads go to the replica, unless they're pinned, in a transaction or follow a write"""
+        self.assertFalse(Service.objects.exists())
+        with use_primary():
+            self.assertTrue(Service.objects.exists())
+        with transaction.atomic():
+            self.assertTrue(Service.objects.exists())
+
+        Service.objects.filter(slug='internet').update(name='Broadband')
+        self.assertTrue(Service.objects.exists())
+
+    def test_requests_are_routed(self):
+        """Tests, that pages are read from the replica, unless the client is pinned to the primary database"""
+        url = reverse('service_details', kwargs={'slug': 'internet'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.cookies['use_primary'] = '1'
+        self.assertEqual(self.client.get(url).status_code, 200)
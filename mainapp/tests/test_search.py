@@ -0,0 +1,72 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import PlanIndex
+from ..services.search import search_plans
+from .test_views import create_service, create_net_plan, create_tv_plan, create_wireless_plan
+
+
+class PlanSearchTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.internet = create_service()
+        create_service('Wireless', 'wireless')
+        create_service('Television', 'tv')
+        self.net_plan = create_net_plan('Home Fiber', 'fiber', price=70)
+        self.cheap_net_plan = create_net_plan('Home Basic', 'basic', price=20)
+        self.wireless_plan = create_wireless_plan('Ultra Home', 'ultra')
+        self.tv_plan = create_tv_plan('Family TV', 'family')
+
+    def test_plans_are_matched_by_name_service_and_description(self):
+        """Tests, that a query is matched against plan name, service name and description"""
+        self.assertEqual([entry.slug for entry in search_plans('fiber').plans], ['fiber'])
+        self.assertEqual([entry.slug for entry in search_plans('internet').plans], ['basic', 'fiber'])
+        self.assertEqual(len(search_plans('jfjfkj').plans), 4)
+
+    def test_every_word_of_query_has_to_match(self):
+        """Tests, that plans have to match all words of a query"""
+        self.assertEqual([entry.slug for entry in search_plans('home wireless').plans], ['ultra'])
+        self.assertEqual(search_plans('home cable').plans, [])
+
+    def test_facets_are_counted(self):
+        """Tests, that facet counts of all matching plans are returned"""
+        facets = search_plans('home').facets
+
+        self.assertEqual(facets['service'], [('internet', 2), ('wireless', 1)])
+        self.assertEqual(facets['internet_type'], [('4G', 1)])
+        self.assertEqual(facets['quality'], [])
+        self.assertEqual(facets['price'], [('0-100', 2), ('100-300', 1)])
+
+    def test_results_are_narrowed_down_by_facets(self):
+        """Tests, that results and facet counts are narrowed down by selected facet values"""
+        results = search_plans('home', {'service': 'internet', 'price': '0-100'})
+
+        self.assertEqual([entry.slug for entry in results.plans], ['basic', 'fiber'])
+        self.assertEqual(results.facets['service'], [('internet', 2)])
+        self.assertEqual(search_plans('home', {'internet_type': '4G'}).plans[0].slug, 'ultra')
+        self.assertEqual(len(search_plans('home', {'price': 'unknown'}).plans), 3)
+
+    def test_search_takes_two_queries(self):
+        """Tests, that results and facet counts are fetched by two queries"""
+        with self.assertNumQueries(2):
+            results = search_plans('home')
+            [entry.service.name for entry in results.plans]
+
+    def test_service_rename_is_searchable(self):
+        """Tests, that renaming a service updates service name of its catalogue entries"""
+        self.internet.name = 'Broadband'
+        self.internet.save()
+
+        self.assertEqual(set(PlanIndex.objects.filter(service=self.internet).values_list('service_name', flat=True)),
+                         {'Broadband'})
+        self.assertEqual(len(search_plans('broadband').plans), 2)
+
+    def test_search_page(self):
+        """Tests, that search page renders matching plans and facet links"""
+        response = self.client.get(reverse('plan_search'), {'q': 'home', 'service': 'internet'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry.slug for entry in response.context['plans']], ['basic', 'fiber'])
+        self.assertContains(response, self.net_plan.get_absolute_url())
+        self.assertContains(response, '?service=internet&amp;q=home&amp;price=0-100')
+        self.assertNotContains(response, self.wireless_plan.get_absolute_url())
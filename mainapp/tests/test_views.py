@@ -1,11 +1,18 @@
-from django.test import TestCase, Client
+import base64
+import json
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 
 from bs4 import BeautifulSoup
 
 from .. import views
 from ..models import TVPlan, WirelessPlan, InternetPlan, Service, Customer, OrderedPlan, OrderedPlansList
+from ..services.db_operations import get_plan_order_flags, recalculate_cart_totals, delete_ordered_plan
 
 
 def create_service(name: str = 'Internet', slug: str = 'internet'):
@@ -101,6 +108,7 @@ def create_user_customer(user_data: dict) -> list:
 class BaseViewTestCase(TestCase):
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = Client()
         self.url = reverse('home')
 
@@ -145,10 +153,40 @@ class BaseViewTestCase(TestCase):
                          )
         self.assertEqual(response.status_code, 200)
 
+    def test_GET_with_warm_cache(self):
+        """Tests, that the main page is served without queries, when best plans are cached"""
+        create_service()
+        create_net_plan()
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Internet 5')
+
+    def test_best_plans_are_ranked_by_popularity_and_price(self):
+        """Tests, that the most ordered plan goes first, and the cheapest one wins among equally ordered plans"""
+        create_service()
+        create_net_plan()
+        cheap_plan = create_net_plan('Smart Net', 'smartnet', 50)
+        popular_plan = create_net_plan('Unlim Ultra Net', 'unlimultranet', 200)
+
+        self.assertEqual(views.get_best_plans()[2], cheap_plan)
+
+        user, customer = create_user_customer({'username': 'testuser', 'password': 'testing321'})
+        OrderedPlan.objects.create(
+            content_object=popular_plan,
+            owner=customer,
+            related_list=OrderedPlansList.objects.create(owner=customer)
+        )
+
+        self.assertEqual(views.refresh_best_plans()[2], popular_plan)
+        self.assertEqual(self.client.get(self.url).context['best_plans'], [None, None, popular_plan])
+
 
 class ServiceDetailViewTestCase(TestCase):
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = Client()
         self.service = create_service()
         self.plan1 = create_net_plan()
@@ -233,10 +271,100 @@ class ServiceDetailViewTestCase(TestCase):
 
         self.assertEqual(response.status_code, 404)
 
+    def test_headline_field_order(self):
+        """Tests ServiceDetailView for right plans order when an argument 'filter' is set to service's headline field"""
+        self.plan2.speed = 100
+        self.plan2.save()
+
+        response = self.client.get(self.url, {'filter': '-speed'})
+
+        self.assertEqual(list(response.context['service_plans'])[0], self.plan2)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PLANS_PAGE_SIZE=2)
+    def test_pages_by_cursor(self):
+        """Tests, that plans are split into pages, which are linked by cursors and keep the order"""
+        self.plan3.price = self.plan1.price
+        self.plan3.save()
+        expected_plans = sorted(self.plan_list, key=lambda plan: (plan.price, plan.id))
+
+        first_page = self.client.get(self.url, {'filter': 'price'})
+        next_cursor = first_page.context['next_cursor']
+        second_page = self.client.get(self.url, {'filter': 'price', 'cursor': next_cursor})
+
+        self.assertEqual(list(first_page.context['service_plans']), expected_plans[:2])
+        self.assertContains(first_page, f'cursor={next_cursor}')
+        self.assertEqual(list(second_page.context['service_plans']), expected_plans[2:])
+        self.assertIsNone(second_page.context['next_cursor'])
+
+    def test_invalid_cursor(self):
+        """Tests, that a malformed cursor points to the first page"""
+        response = self.client.get(self.url, {'filter': 'name', 'cursor': 'weird123'})
+
+        self.assertEqual(list(response.context['service_plans']),
+                         sorted(self.plan_list, key=lambda plan: plan.name))
+
+    def test_out_of_range_cursor(self):
+        """Tests, that a cursor with an empty value, or an id out of the bigint range points to the first page"""
+        cursors = [[None, 1], ['Smart Net', 99999999999999999999999], ['Smart Net', 0], ['Smart Net', '1']]
+        for q_filter in ['name', 'price']:
+            for cursor in cursors:
+                encoded = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+                response = self.client.get(self.url, {'filter': q_filter, 'cursor': encoded})
+
+                self.assertEqual(response.status_code, 200)
+                rows = BeautifulSoup(response.content, 'html.parser').find_all('th', scope='row')
+                self.assertEqual(len(rows), len(self.plan_list))
+
+    def test_anonymous_page_is_cached_per_filter(self):
+        """Tests, that anonymous visitors get a cached page per filter, which is dropped when a plan is changed"""
+        self.client.get(self.url, {'filter': 'price'})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'filter': 'price', 'utm_source': 'campaign'})
+        self.assertEqual(BeautifulSoup(response.content, 'html.parser').find('th', scope='row').text, 'Smart Net')
+
+        response = self.client.get(self.url, {'filter': '-price'})
+        self.assertEqual(BeautifulSoup(response.content, 'html.parser').find('th', scope='row').text,
+                         'Unlim Ultra Net')
+
+        self.plan2.name = 'Smart Net Lite'
+        self.plan2.save()
+        response = self.client.get(self.url, {'filter': 'price'})
+        self.assertEqual(BeautifulSoup(response.content, 'html.parser').find('th', scope='row').text,
+                         'Smart Net Lite')
+
+    def test_authenticated_page_is_not_cached(self):
+        """Tests, that users with a session always get a freshly rendered page"""
+        user_credentials = {'username': 'testuser', 'password': 'testing321'}
+        create_user_customer(user_credentials)
+        self.client.get(self.url)
+        self.client.login(**user_credentials)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['service'], self.service)
+        self.assertContains(response, 'My Account')
+
+    def test_anonymous_page_is_not_modified(self):
+        """Tests, that an anonymous visitor with the current version of the page gets 304 until a plan is changed"""
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('Cookie', response['Vary'])
+
+        self.plan2.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
 
 class PlanDetailViewTestCase(TestCase):
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = Client()
         create_service()
         self.plan = create_net_plan()
@@ -296,7 +424,6 @@ class PlanDetailViewTestCase(TestCase):
             owner=self.customer,
             related_list=ordered_plan_list
         )
-        ordered_plan_list.plans.add(ordered_plan)
 
         self.client.login(**self.user_credentials)
         response = self.client.get(self.url)
@@ -325,7 +452,6 @@ class PlanDetailViewTestCase(TestCase):
             owner=self.customer,
             related_list=ordered_plan_list
         )
-        ordered_plan_list.plans.add(ordered_plan)
         plan2 = create_net_plan(name='Giga Speed', slug='gigaspeed')
 
         self.client.login(**self.user_credentials)
@@ -341,6 +467,24 @@ class PlanDetailViewTestCase(TestCase):
         self.assertEqual(response.context.get('plan'), plan2)
         self.assertEqual(response.status_code, 200)
 
+    def test_order_flags_with_single_query(self):
+        """Tests that both order flags of a plan are answered by one query regardless of cart size"""
+        ordered_plan_list = OrderedPlansList.objects.create(
+            owner=self.customer
+        )
+        OrderedPlan.objects.create(
+            content_object=self.plan,
+            owner=self.customer,
+            related_list=ordered_plan_list
+        )
+        plan2 = create_net_plan(name='Giga Speed', slug='gigaspeed')
+        ContentType.objects.get_for_model(self.plan)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_plan_order_flags(self.plan, self.user), (True, True))
+        with self.assertNumQueries(1):
+            self.assertEqual(get_plan_order_flags(plan2, self.user), (True, False))
+
 
 class OrderSubmissionTesCase(TestCase):
 
@@ -395,9 +539,78 @@ class OrderSubmissionTesCase(TestCase):
 
         self.assertEqual(Customer.objects.get(user=self.user).city, 'Kharkiv')
         self.assertIn(OrderedPlan.objects.filter(object_id=self.plan.id, owner=self.customer).first(),
-                      OrderedPlansList.objects.get(owner=self.customer).plans.all())
+                      OrderedPlansList.objects.get(owner=self.customer).related_plans_list.all())
         self.assertEqual(response.status_code, 302)
 
+    def test_POST_adds_plan_price_to_total(self):
+        """Tests order_submission view for adding the plan price to the ordered plan list total"""
+        self.client.login(**self.user_credentials)
+
+        self.client.post(self.url, data={
+            'first_name': self.user.first_name,
+            'last_name': self.user.last_name,
+            'email': self.user.email,
+            'phone': '0674324959',
+            'city': 'Kharkiv',
+            'street': 'Teststreet',
+            'house_num': 13,
+            'apartment_num': 58
+        })
+
+        self.assertEqual(OrderedPlansList.objects.get(owner=self.customer).final_price, self.plan.price)
+
+    def test_POST_twice(self):
+        """Tests order_submission view for not creating a second ordered plan of the same plan"""
+        self.client.login(**self.user_credentials)
+        order_data = {
+            'first_name': self.user.first_name,
+            'last_name': self.user.last_name,
+            'email': self.user.email,
+            'phone': '0674324959',
+            'city': 'Kharkiv',
+            'street': 'Teststreet',
+            'house_num': 13,
+            'apartment_num': 58
+        }
+
+        self.client.post(self.url, data=order_data)
+        response = self.client.post(self.url, data=order_data)
+
+        self.assertEqual(OrderedPlan.objects.filter(owner=self.customer).count(), 1)
+        self.assertEqual(response.url, reverse('account'))
+
+    def test_POST_with_service_in_use(self):
+        """Tests order_submission view for not ordering a second plan of the same service"""
+        self.client.login(**self.user_credentials)
+        plan2 = create_net_plan(name='Giga Speed', slug='gigaspeed')
+        order_data = {
+            'first_name': self.user.first_name,
+            'last_name': self.user.last_name,
+            'email': self.user.email,
+            'phone': '0674324959',
+            'city': 'Kharkiv',
+            'street': 'Teststreet',
+            'house_num': 13,
+            'apartment_num': 58
+        }
+
+        self.client.post(self.url, data=order_data)
+        response = self.client.post(plan2.get_order_page(), data=dict(order_data, city='Lviv'))
+
+        self.assertEqual(list(OrderedPlan.objects.filter(owner=self.customer).values_list('object_id', flat=True)),
+                         [self.plan.id])
+        self.assertEqual(Customer.objects.get(user=self.user).city, 'Kharkiv')
+        self.assertEqual(response.url, reverse('service_in_use_order'))
+
+    def test_service_in_use_is_enforced_by_database(self):
+        """Tests, that the database rejects a second ordered plan of the same service"""
+        plan2 = create_net_plan(name='Giga Speed', slug='gigaspeed')
+        plan_list = OrderedPlansList.objects.get(owner=self.customer)
+        OrderedPlan.objects.create(content_object=self.plan, owner=self.customer, related_list=plan_list)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            OrderedPlan.objects.create(content_object=plan2, owner=self.customer, related_list=plan_list)
+
     def test_POST_with_invalid_form_data(self):
         """
         Tests order_submission view for not changing customer's info with passed invalid data
@@ -447,7 +660,6 @@ class OrderedPlanCancelTestCase(TestCase):
             related_list=self.ordered_plan_list,
             owner=self.customer
         )
-        self.ordered_plan_list.plans.add(self.ordered_plan)
         self.url = self.ordered_plan.get_cancel_url()
 
     def test_no_login(self):
@@ -467,12 +679,63 @@ class OrderedPlanCancelTestCase(TestCase):
                                                      owner=self.customer).first())
         self.assertNotIn(
             OrderedPlan.objects.filter(content_type=self.ordered_plan.content_type, owner=self.customer).first(),
-            OrderedPlansList.objects.get(owner=self.customer).plans.all()
+            OrderedPlansList.objects.get(owner=self.customer).related_plans_list.all()
         )
         self.assertEqual(response.url, reverse('account'))
         self.assertEqual(response.status_code, 302)
 
 
+class CartTotalTestCase(TestCase):
+
+    def setUp(self) -> None:
+        create_service()
+        create_service('Television', 'tv')
+        self.net_plan = create_net_plan(price=70)
+        self.tv_plan = create_tv_plan()
+        self.user, self.customer = create_user_customer({'username': 'testuser', 'password': 'testing321'})
+        self.plan_list = OrderedPlansList.objects.create(owner=self.customer)
+        for plan in (self.net_plan, self.tv_plan):
+            OrderedPlan.objects.create(content_object=plan, owner=self.customer, related_list=self.plan_list)
+
+    def test_recalculate_totals_with_one_query(self):
+        """Tests, that totals of all lists are recomputed from plan prices by a single query"""
+        empty_user, empty_customer = create_user_customer({'username': 'emptyuser', 'password': 'testing321'})
+        empty_list = OrderedPlansList.objects.create(owner=empty_customer, final_price=15)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(recalculate_cart_totals(), 2)
+
+        self.plan_list.refresh_from_db()
+        empty_list.refresh_from_db()
+        self.assertEqual(self.plan_list.final_price, 170)
+        self.assertEqual(empty_list.final_price, 0)
+
+    def test_cancel_subtracts_plan_price(self):
+        """Tests, that a cancelled plan's price is subtracted from the total"""
+        recalculate_cart_totals()
+
+        delete_ordered_plan(self.net_plan, self.user)
+        delete_ordered_plan(self.net_plan, self.user)
+
+        self.plan_list.refresh_from_db()
+        self.assertEqual(self.plan_list.final_price, 100)
+
+    def test_cancel_after_price_change(self):
+        """Tests, that cancelling a plan, which price changed since the order, keeps the total right"""
+        recalculate_cart_totals()
+        other_user, other_customer = create_user_customer({'username': 'otheruser', 'password': 'testing321'})
+        other_list = OrderedPlansList.objects.create(owner=other_customer, final_price=15)
+        self.net_plan.price = 150
+        self.net_plan.save()
+
+        delete_ordered_plan(self.net_plan, self.user)
+
+        self.plan_list.refresh_from_db()
+        other_list.refresh_from_db()
+        self.assertEqual(self.plan_list.final_price, 100)
+        self.assertEqual(other_list.final_price, 15)
+
+
 class AnonymousOrderTestCase(TestCase):
 
     def setUp(self) -> None:
@@ -1,21 +1,35 @@
+from django.conf import settings
 from django.urls import path
 
+from . import async_views
 from .views import (
     BaseView,
     ServiceDetailView,
     PlanDetailView,
+    plan_search,
     order_submission,
     ordered_plan_cancel,
     anonymous_order,
-    service_in_use_order
+    service_in_use_order,
+    database_health,
+    database_health_details
 )
 
+if settings.ASYNC_VIEWS:
+    BaseView, ServiceDetailView, PlanDetailView = (
+        async_views.AsyncBaseView, async_views.AsyncServiceDetailView, async_views.AsyncPlanDetailView
+    )
+    order_submission = async_views.order_submission
+
 urlpatterns = [
     path('', BaseView.as_view(), name='home'),
     path('services/<str:slug>/', ServiceDetailView.as_view(), name='service_details'),
     path('plans/<str:s_slug>/<str:p_slug>/', PlanDetailView.as_view(), name='plan_details'),
+    path('search/', plan_search, name='plan_search'),
     path('order-submission/<str:s_slug>/<str:p_slug>/', order_submission, name='order_submission'),
     path('cancel-plan/<str:s_slug>/<str:p_slug>/', ordered_plan_cancel, name='cancel_plan'),
     path('anonym-order/', anonymous_order, name='anonym_order'),
     path('service_in_use/', service_in_use_order, name='service_in_use_order'),
+    path('health/db/', database_health, name='database_health'),
+    path('health/db/details/', database_health_details, name='database_health_details'),
 ]
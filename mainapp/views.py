@@ -1,12 +1,23 @@
+from urllib.parse import urlencode
+
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 from django.views.generic import View, DetailView
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 
 from .models import Service
 from .forms import OrderSubmissionForm
+from .mixins import AnonymousPageCacheMixin
 from .services.db_operations import *
 from .services.mailing import *
+from .services.billing import is_blocked
+from .services.listing import get_plans_page, normalize_filter, normalize_cursor
+from .services.search import search_plans, FACET_FIELDS
+from .services.filtering import clean_plan_filters, encode_plan_filters
+from .db.health import are_databases_healthy, get_database_health
 
 
 class BaseView(View):
@@ -20,15 +31,42 @@ class BaseView(View):
         return render(request, 'base.html', context=context)
 
 
-class ServiceDetailView(DetailView):
-    """Renders page with plans of the service, and filtering function, which works by passing filter argument in url"""
+class ServiceDetailView(AnonymousPageCacheMixin, DetailView):
+    """
+    Renders page with plans of the service, and filtering function, which works by passing filter argument in url.
+    Plans are narrowed down by range params (e.g. min_price, max_speed) and facet params (e.g. internet_type=4G,5G)
+    of the service, invalid ones are ignored.
+    Plans are split into pages, next page is requested by passing cursor argument in url
+    """
+
+    def get_page_cache_params(self) -> dict:
+        plan = get_plan_model(self.kwargs.get('slug'))
+        if plan is None:
+            return {}
+        q_filter = self.request.GET.get('filter')
+        return {
+            'filter': normalize_filter(plan, q_filter),
+            'cursor': normalize_cursor(plan, q_filter, self.request.GET.get('cursor')),
+            **encode_plan_filters(clean_plan_filters(plan, self.request.GET, ignore_invalid=True))
+        }
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        plan = get_plan_model(self.get_object().slug)
-        q_filter = self.request.GET.get('filter')
+        plan = get_plan_model(self.object.slug)
+        if plan is None:
+            context['service_plans'], context['next_cursor'], context['q_filter'] = [], None, ''
+            context['plan_filters'], context['filters_query'] = {}, ''
+            return context
 
-        context['service_plans'] = get_plans_ordered_by_filter(plan, q_filter)
+        q_filter = self.request.GET.get('filter')
+        filters = clean_plan_filters(plan, self.request.GET, ignore_invalid=True)
+        plans_page = get_plans_page(plan, q_filter, self.request.GET.get('cursor'), filters=filters)
+
+        context['service_plans'] = plans_page.plans
+        context['next_cursor'] = plans_page.next_cursor
+        context['q_filter'] = normalize_filter(plan, q_filter)
+        context['plan_filters'] = encode_plan_filters(filters)
+        context['filters_query'] = urlencode(context['plan_filters'])
         return context
 
     model = Service
@@ -37,33 +75,62 @@ class ServiceDetailView(DetailView):
     template_name = 'mainapp/service_details.html'
 
 
-class PlanDetailView(DetailView):
+class PlanDetailView(AnonymousPageCacheMixin, DetailView):
     """
     Renders page with plan details and "Order" button, which display 'Already ordered', if 'pla_is_ordered' is True,
     if 'plan_in_use' is True, then redirects you to account page and ask to delete already ordered plan in that service,
-    if they both are False, user is redirected to order_submission view
+    if they both are False, user is redirected to order_submission view. Blocked customers see 'Account blocked' instead
     """
 
-    def dispatch(self, request, *args, **kwargs):
-        self.model = get_plan_model(kwargs.get('s_slug'))
-        self.queryset = self.model.objects.all()
-        return super().dispatch(request, *args, **kwargs)
+    def get_object(self, queryset=None):
+        return get_plan_instance(self.kwargs.get('s_slug'), self.kwargs.get('p_slug'))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.request.user.is_authenticated:
-            service_in_use = is_service_in_use(self.get_object().service, self.request.user)
-            plan_is_ordered = is_ordered(self.get_object(), self.request.user)
+            service_in_use, plan_is_ordered = get_plan_order_flags(self.object, self.request.user)
+            customer_is_blocked = is_blocked(self.request.user)
         else:
-            service_in_use, plan_is_ordered = False
+            service_in_use, plan_is_ordered, customer_is_blocked = False, False, False
 
         context['service_in_use'] = service_in_use
         context['is_ordered'] = plan_is_ordered
+        context['is_blocked'] = customer_is_blocked
         return context
 
     context_object_name = 'plan'
     template_name = 'mainapp/plan_details.html'
-    slug_url_kwarg = 'p_slug'
+
+
+def plan_search(request):
+    """
+    Renders page with plans of all services, that match 'q' param, and counts of their facet values.
+    Results are narrowed down by facet values, passed in params named after the facets,
+    every facet value links to the results narrowed down by it, or widened back, if it's already selected
+    """
+    query = request.GET.get('q', '').strip()
+    selected = {field: request.GET[field] for field in FACET_FIELDS if request.GET.get(field)}
+    context = {'query': query, 'plans': [], 'facets': []}
+
+    if query:
+        results = search_plans(query, selected)
+        context['plans'] = results.plans
+        for field in FACET_FIELDS:
+            values = []
+            for value, amount in results.facets[field]:
+                params = dict(selected, q=query, **{field: value})
+                if selected.get(field) == value:
+                    del params[field]
+                values.append({
+                    'value': value,
+                    'amount': amount,
+                    'url': f'?{urlencode(params)}',
+                    'is_selected': selected.get(field) == value
+                })
+            if values:
+                context['facets'].append((field.replace('_', ' ').capitalize(), values))
+
+    return render(request, 'mainapp/plan_search.html', context=context)
 
 
 @login_required
@@ -76,35 +143,27 @@ def order_submission(request, **kwargs):
     s_slug, p_slug = kwargs.get('s_slug'), kwargs.get('p_slug')
 
     plan = get_plan_instance(s_slug, p_slug)
-    customer = get_customer(request.user)
-    order_form = OrderSubmissionForm(
-        initial={
-            'plan': plan.name,
-            'first_name': request.user.first_name,
-            'last_name': request.user.last_name,
-            'email': request.user.email,
-            'phone': customer.phone,
-            'city': customer.city,
-            'street': customer.street,
-            'house_num': customer.house_num,
-            'apartment_num': customer.apartment_num
-        }
-    )
 
     if request.method == 'POST':
-        order_form = OrderSubmissionForm(request.POST)
+        order_form = OrderSubmissionForm(request.POST, initial={'plan': plan.name})
         if order_form.is_valid():
-            # sending notification mails
-            admin_order_mail(order_form.cleaned_data, "kykucak@gmail.com")
-            customer_order_mail(order_form.cleaned_data)
-
-            # filling customer with new data
-            update_customer_data_after_order(order_form.cleaned_data, request.user)
-
-            create_ordered_plan(plan, request.user)
+            try:
+                submit_order(plan, request.user, order_form.cleaned_data)
+            except PlanAlreadyOrderedError:
+                messages.add_message(request, messages.INFO, 'You have already ordered this plan.')
+                return redirect('account')
+            except ServiceInUseError:
+                return redirect('service_in_use_order')
+            except CustomerBlockedError:
+                return blocked_customer_order(request)
 
             messages.add_message(request, messages.SUCCESS, 'A mail with instructions was sent to your email!')
             return redirect('home')
+    else:
+        customer = get_customer(request.user)
+        if customer.status == Customer.BLOCKED:
+            return blocked_customer_order(request)
+        order_form = OrderSubmissionForm(initial=get_order_form_initial(plan, request.user, customer))
 
     context = {
         'order_form': order_form,
@@ -114,6 +173,31 @@ def order_submission(request, **kwargs):
     return render(request, 'mainapp/order_plan.html', context=context)
 
 
+def submit_order(plan, user, order_data) -> None:
+    """Places the order and queues notification mails about it in one transaction"""
+    with transaction.atomic():
+        place_order(plan, user, order_data)
+
+        # queueing notification mails, they're sent by the mail worker after the order is saved
+        admin_order_mail(order_data, "kykucak@gmail.com")
+        customer_order_mail(order_data)
+
+
+def get_order_form_initial(plan, user, customer) -> dict:
+    """Returns initial data of order form, pre-pasted from user and customer info"""
+    return {
+        'plan': plan.name,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+        'phone': customer.phone,
+        'city': customer.city,
+        'street': customer.street,
+        'house_num': customer.house_num,
+        'apartment_num': customer.apartment_num
+    }
+
+
 @login_required
 def ordered_plan_cancel(request, **kwargs):
     """
@@ -128,6 +212,13 @@ def ordered_plan_cancel(request, **kwargs):
     return redirect('account')
 
 
+def blocked_customer_order(request):
+    """Blocked customer tries to order plan before the debt on the account is paid"""
+    messages.add_message(request, messages.INFO,
+                         'Your account is blocked for a debt. Top up your balance to order plans.')
+    return redirect('account')
+
+
 def anonymous_order(request):
     """User tries to order plan without being authenticated"""
     messages.add_message(request, messages.INFO, 'Before you can order plans, you must login first.')
@@ -141,3 +232,21 @@ def service_in_use_order(request):
                          f'You already have an ordered plan for this service.'
                          'In order to switch your plan - delete your active one and choose other.')
     return redirect('account')
+
+
+def database_health(request):
+    """
+    Returns JSON with whether all databases answer, and responds with 503, if some database doesn't.
+    The endpoint is public, so details are reported to staff by database_health_details
+    """
+    is_healthy = are_databases_healthy()
+    return JsonResponse({'ok': is_healthy}, status=200 if is_healthy else 503)
+
+
+@staff_member_required
+def database_health_details(request):
+    """
+    Returns JSON with ping results and connection settings of every database, and statistics of connection pools
+    of the worker, that served the request, e.g. their saturation and wait time
+    """
+    return JsonResponse(get_database_health())
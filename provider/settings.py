@@ -46,12 +46,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'mainapp.middleware.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'mainapp.middleware.QueryInstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'provider.urls'
@@ -79,17 +81,86 @@ MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_POOL picks how connections are reused:
+#  - '' keeps a connection of every worker thread open for DB_CONN_MAX_AGE seconds
+#  - 'internal' shares an in-process pool of DB_POOL_MAX_SIZE connections by threads of a worker
+#  - 'pgbouncer' keeps connections to pgbouncer (DB_HOST, DB_PORT) in transaction pooling mode,
+#    which doesn't support server-side cursors
+DB_POOL = os.getenv('DB_POOL', '')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'mainapp.db.backends.postgresql_pool' if DB_POOL == 'internal' else 'django.db.backends.postgresql',
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': '5432',
+        'PORT': os.getenv('DB_PORT', '5432'),
+        # pooled connections go back to the pool at the end of every request
+        'CONN_MAX_AGE': 0 if DB_POOL == 'internal' else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL == 'pgbouncer',
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            # seconds a request waits for a free connection
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            # seconds a connection stays idle in the pool before it's checked
+            'HEALTH_CHECK_INTERVAL': int(os.getenv('DB_HEALTH_CHECK_INTERVAL', 30)),
+        },
+    }
+}
+
+# Read replicas of the default database, one per host of comma separated DB_REPLICA_HOSTS,
+# tests read them from the test database of the primary
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['mainapp.db.routers.ReplicaRouter']
+
+# Seconds reads of a client stay on the primary database after its write, and reads of all clients
+# after a change of the catalogue, it should cover a usual replication lag
+REPLICA_STICKINESS_SECONDS = int(os.getenv('REPLICA_STICKINESS_SECONDS', 5))
+REPLICA_STICKINESS_COOKIE = 'use_primary'
+
+# Seconds a persistent connection is used without checking, that the database still answers
+DB_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_HEALTH_CHECK_INTERVAL', 30))
+# Seconds a worker reuses the result of pinging databases for the health endpoint
+DB_HEALTH_ENDPOINT_INTERVAL = int(os.getenv('DB_HEALTH_ENDPOINT_INTERVAL', 5))
+
+# DB_ENGINE=sqlite runs the project on a local SQLite file, e.g. to generate load testing data without PostgreSQL
+if os.getenv('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_NAME') or BASE_DIR / 'db.sqlite3',
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+# LocMemCache is local to a process, so catalogue invalidation wouldn't reach other workers,
+# that's why a shared cache (Redis, Memcached) is required, unless the project runs in DEBUG mode
+SHARED_CACHE_REQUIRED = not DEBUG
+
+# Seconds catalogue data (plans, services) stays cached, it's invalidated on every catalogue change anyway
+CATALOGUE_CACHE_TIMEOUT = 60 * 60
+
+# Amount of plans shown on one page of a service
+PLANS_PAGE_SIZE = 20
+# Amount of the most relevant plans shown on the search page
+SEARCH_RESULTS_LIMIT = 20
+
+# Seconds best plans stay cached before their popularity ranking is recomputed
+BEST_PLANS_CACHE_TIMEOUT = 15 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -143,9 +214,56 @@ CRISPY_TEMPLATE_PACK = 'bootstrap4'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_PASSWORD')
+
+# Outbox of order notifications, drained by "manage.py send_queued_mail"
+MAIL_QUEUE_BATCH_SIZE = 50
+# Amount of mails sent over one mail server connection before it's reopened
+MAIL_CONNECTION_BATCH_SIZE = 100
+MAIL_QUEUE_MAX_ATTEMPTS = 5
+# Seconds before the first retry of a failed mail, the delay doubles after every next failure
+MAIL_QUEUE_RETRY_DELAY = 60
+# Seconds after which a mail claimed by a mail worker that never reported the result is claimed again
+MAIL_QUEUE_CLAIM_TIMEOUT = 600
+
+# Default and maximal amount of plans on a page of API plan lists
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# Amount of customers billed in one transaction by "manage.py run_billing"
+BILLING_CHUNK_SIZE = 1000
+
+# Serve the catalogue pages and the order form by async views, which don't take a thread while they wait
+# on the database and the cache. Turn it on by ASYNC_VIEWS=1 environment variable, when the project is served
+# by an ASGI server (provider.asgi), under WSGI async views only add an event loop to every request
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == '1'
+# Maximum amount of database calls of async views, that run at once in a worker process
+ASYNC_DB_CONCURRENCY = int(os.getenv('ASYNC_DB_CONCURRENCY', 10))
+
+# Per-request SQL instrumentation: query count, database and template time in Server-Timing header and
+# a log line of "mainapp.middleware" logger. Turned on by SQL_INSTRUMENTATION=1 environment variable
+SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION') == '1'
+SQL_INSTRUMENTATION_VIEW_MODULES = ('mainapp.views', 'mainapp.async_views', 'users.views')
+# Query shapes, repeated this many times in one request, are reported as a possible N+1
+SQL_INSTRUMENTATION_REPEAT_THRESHOLD = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'mainapp': {
+            'handlers': ['console'],
+            'level': os.getenv('MAINAPP_LOG_LEVEL', 'INFO' if SQL_INSTRUMENTATION else 'WARNING'),
+        },
+    },
+}
@@ -9,6 +9,7 @@ router.register(r'services', api_views.ServiceViewSet)
 router.register(r'internet', api_views.InternetViewSet)
 router.register(r'wireless', api_views.WirelessViewSet)
 router.register(r'tv', api_views.TvViewSet)
+router.register(r'plans', api_views.CatalogueViewSet, basename='plans')
 # router.register(r'customers', api_views.CustomerViewSet)
 
 urlpatterns = [
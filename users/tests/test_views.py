@@ -3,7 +3,7 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 
 from mainapp.models import Customer, OrderedPlansList, OrderedPlan
-from mainapp.tests.test_views import create_service, create_net_plan
+from mainapp.tests.test_views import create_service, create_net_plan, create_wireless_plan, create_tv_plan
 
 from ..views import register, account
 
@@ -129,13 +129,40 @@ class AccountTestCase(TestCase):
             owner=self.customer,
             related_list=plan_list
         )
-        plan_list.plans.add(ordered_plan)
 
         response = self.client.get(self.url)
 
         self.assertEqual(response.context.get('plans_list'), plan_list)
         self.assertEqual(response.status_code, 200)
 
+    def test_GET_runs_one_query_per_plan_type(self):
+        """
+        Checks, that the account page fetches ordered plans with one query per plan type,
+        a customer has at most one ordered plan of every service
+        """
+        self.client.login(**self.user_credentials)
+        create_service()
+        create_service('Wireless', 'wireless')
+        create_service('Television', 'tv')
+        plan_list = OrderedPlansList.objects.create(
+            owner=self.customer
+        )
+        for plan in (create_net_plan(), create_wireless_plan(), create_tv_plan()):
+            OrderedPlan.objects.create(
+                content_object=plan,
+                owner=self.customer,
+                related_list=plan_list
+            )
+            if plan_list.related_plans_list.count() == 1:
+                with self.assertNumQueries(5):
+                    response = self.client.get(self.url)
+                self.assertEqual(len(response.context.get('ordered_plans')), 1)
+
+        with self.assertNumQueries(7):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context.get('ordered_plans')), 3)
+        self.assertContains(response, plan.name)
+
     def test_GET_no_login(self):
         """
         Checks whether unauthenticated user is sent to login page
@@ -1,16 +1,48 @@
+from collections import defaultdict
+
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
 
-from mainapp.models import Customer, OrderedPlansList
+from mainapp.models import Customer, OrderedPlan, OrderedPlansList, Account
 
 
 def create_customer__ordered_plan_list(username: str) -> None:
-    """Creates customer and customer's ordered plan list"""
+    """Creates customer, customer's ordered plan list and account"""
     new_customer = Customer.objects.create(user=User.objects.get(username=username))
     OrderedPlansList.objects.create(owner=new_customer)
+    Account.objects.create(customer=new_customer)
 
 
 def get_ordered_plan_list(user: User) -> OrderedPlansList:
     """Returns user's ordered plan list"""
-    customer = Customer.objects.get(user=user)
-    plans_list = OrderedPlansList.objects.get(owner=customer)
+    plans_list = OrderedPlansList.objects.get(owner__user=user)
     return plans_list
+
+
+def get_ordered_plans(plans_list: OrderedPlansList) -> list:
+    """
+    Returns ordered plans of the list with their plans and plans' services already loaded.
+    Plans are fetched with one query per plan type, so the amount of queries doesn't depend on the cart size
+    """
+    ordered_plans = list(plans_list.related_plans_list.order_by('id'))
+
+    ids_by_content_type = defaultdict(set)
+    for ordered_plan in ordered_plans:
+        ids_by_content_type[ordered_plan.content_type_id].add(ordered_plan.object_id)
+
+    plans = {}
+    for content_type_id, ids in ids_by_content_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        for plan in model.objects.select_related('service').filter(id__in=ids):
+            plans[content_type_id, plan.id] = plan
+
+    content_object = OrderedPlan._meta.get_field('content_object')
+    hydrated_plans = []
+    for ordered_plan in ordered_plans:
+        plan = plans.get((ordered_plan.content_type_id, ordered_plan.object_id))
+        # skipping ordered plans, which plans were deleted from the catalogue
+        if plan is not None:
+            content_object.set_cached_value(ordered_plan, plan)
+            hydrated_plans.append(ordered_plan)
+
+    return hydrated_plans
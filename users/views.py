@@ -4,7 +4,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 
 from .forms import UserRegistrationForm, UserUpdateForm
-from .user_services import create_customer__ordered_plan_list, get_ordered_plan_list
+from .user_services import create_customer__ordered_plan_list, get_ordered_plan_list, get_ordered_plans
 
 
 @csrf_exempt
@@ -36,7 +36,8 @@ def account(request):
     plan_list = get_ordered_plan_list(request.user)
     context = {
         'u_form': u_form,
-        'plans_list': plan_list
+        'plans_list': plan_list,
+        'ordered_plans': get_ordered_plans(plan_list)
     }
 
     return render(request, 'users/account.html', context=context)